@@ -5,7 +5,7 @@
     "name": "NK Sign",
     "summary": """
         Allow to sign documents inside Odoo CE""",
-    "version": "18.0.1.0.1",
+    "version": "18.0.1.0.6",
     "license": "AGPL-3",
     "author": "Dixmit,Odoo Community Association (OCA)",
     "website": "https://github.com/OCA/sign",
@@ -16,10 +16,14 @@
         "data/data.xml",
         "wizards/res_config_settings_views.xml",
         "data/ir_sequence_data.xml",
+        "data/ir_cron_data.xml",
         "wizards/sign_oca_template_generate.xml",
         "wizards/sign_oca_template_generate_multi.xml",
         "views/res_partner_views.xml",
         "views/sign_oca_request_log.xml",
+        "views/sign_oca_render_job.xml",
+        "views/sign_oca_chain_audit.xml",
+        "views/sign_oca_metric.xml",
         "views/sign_oca_request.xml",
         "security/ir.model.access.csv",
         
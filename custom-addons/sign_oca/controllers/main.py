@@ -55,6 +55,7 @@ class PortalSign(CustomerPortal):
                     "access_token": access_token,
                     "signer_id": signer_sudo.id,
                     "lang": signer_sudo.partner_id.lang,
+                    "content_hash": signer_sudo.request_id._get_content_hash(),
                 },
             },
         )
@@ -65,16 +66,81 @@ class PortalSign(CustomerPortal):
         auth="public",
         website=True,
     )
-    def get_sign_oca_content_access(self, signer_id, access_token):
+    def get_sign_oca_content_access(self, signer_id, access_token, **kwargs):
         try:
             signer_sudo = self._document_check_access(
                 "sign.oca.request.signer", signer_id, access_token
             )
         except (AccessError, MissingError):
             return request.redirect("/my")
-        return http.Stream.from_binary_field(
-            signer_sudo.request_id, "data"
-        ).get_response(mimetype="application/pdf")
+        stream = signer_sudo.request_id._get_data_stream()
+        # An URL with the hash of the current version never changes, any
+        # other is revalidated with the ETag (304 when it did not change)
+        immutable = bool(kwargs.get("hash")) and kwargs["hash"] == stream.etag
+        return self._get_stream_response(stream, immutable)
+
+    def _get_stream_response(self, stream, immutable):
+        """Response of a document stream, only cacheable by the browser:
+        documents are confidential and shared caches would keep them."""
+        if not immutable:
+            stream.max_age = 0
+        response = stream.get_response(immutable=immutable)
+        response.cache_control.public = False
+        response.cache_control.private = True
+        return response
+
+    def _get_page_response(self, sign_request, page, **kwargs):
+        try:
+            page_sudo = request.env["sign.oca.request.page"]._get_page(
+                sign_request, page
+            )
+        except MissingError:
+            return request.not_found()
+        stream = page_sudo._get_data_stream()
+        immutable = kwargs.get("hash") == page_sudo.content_hash
+        return self._get_stream_response(stream, immutable)
+
+    @http.route(
+        ["/sign_oca/content/<int:signer_id>/<string:access_token>/page/<int:page>"],
+        type="http",
+        auth="public",
+        website=True,
+    )
+    def get_sign_oca_page_access(self, signer_id, access_token, page, **kwargs):
+        try:
+            signer_sudo = self._document_check_access(
+                "sign.oca.request.signer", signer_id, access_token
+            )
+        except (AccessError, MissingError):
+            return request.redirect("/my")
+        return self._get_page_response(signer_sudo.request_id, page, **kwargs)
+
+    @http.route(
+        ["/sign_oca/pages/<int:signer_id>/<string:access_token>"],
+        type="json",
+        auth="public",
+        website=True,
+    )
+    def get_sign_oca_pages_access(self, signer_id, access_token):
+        try:
+            signer_sudo = self._document_check_access(
+                "sign.oca.request.signer", signer_id, access_token
+            )
+        except (AccessError, MissingError):
+            return request.redirect("/my")
+        return signer_sudo._get_page_manifest(access_token)
+
+    @http.route(
+        ["/sign_oca/request/<int:request_id>/page/<int:page>"],
+        type="http",
+        auth="user",
+    )
+    def get_sign_oca_request_page(self, request_id, page, **kwargs):
+        sign_request = request.env["sign.oca.request"].browse(request_id).exists()
+        if not sign_request:
+            return request.not_found()
+        sign_request.check_access("read")
+        return self._get_page_response(sign_request, page, **kwargs)
 
 
     @http.route(
@@ -112,3 +178,18 @@ class PortalSign(CustomerPortal):
         return signer_sudo.action_sign(
             items, access_token=access_token, latitude=latitude, longitude=longitude
         )
+
+    @http.route(
+        ["/sign_oca/status/<int:signer_id>/<string:access_token>"],
+        type="json",
+        auth="public",
+        website=True,
+    )
+    def get_sign_oca_status_access(self, signer_id, access_token):
+        try:
+            signer_sudo = self._document_check_access(
+                "sign.oca.request.signer", signer_id, access_token
+            )
+        except (AccessError, MissingError):
+            return request.redirect("/my")
+        return signer_sudo._get_render_status()
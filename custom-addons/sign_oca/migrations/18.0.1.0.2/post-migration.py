@@ -0,0 +1,66 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import hashlib
+import logging
+from base64 import b64decode
+
+from odoo import SUPERUSER_ID, api
+from odoo.tools.sql import column_exists
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 100
+
+
+def migrate(cr, version):
+    if not column_exists(cr, "sign_oca_request", "data_legacy"):
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    attachment_model = env["ir.attachment"]
+    cr.execute(
+        "SELECT id FROM sign_oca_request WHERE data_legacy IS NOT NULL ORDER BY id"
+    )
+    request_ids = [row[0] for row in cr.fetchall()]
+    template_attachments = {}
+    shared = 0
+    for index in range(0, len(request_ids), BATCH_SIZE):
+        cr.execute(
+            "SELECT id, template_id, data_legacy FROM sign_oca_request WHERE id IN %s",
+            (tuple(request_ids[index : index + BATCH_SIZE]),),
+        )
+        for request_id, template_id, value in cr.fetchall():
+            datas = bytes(value)
+            vals = {
+                "name": "data",
+                "res_model": "sign.oca.request",
+                "res_id": request_id,
+                "res_field": "data",
+            }
+            if template_id not in template_attachments:
+                template_attachments[template_id] = (
+                    template_id
+                    and env["sign.oca.template"]
+                    .browse(template_id)
+                    ._get_data_attachment()
+                )
+            template_attachment = template_attachments[template_id]
+            checksum = hashlib.sha1(b64decode(datas)).hexdigest()
+            if template_attachment and template_attachment.checksum == checksum:
+                template_attachment._sign_oca_share(vals)
+                shared += 1
+            else:
+                attachment_model.create(dict(vals, datas=datas))
+        env.invalidate_all()
+    cr.execute("ALTER TABLE sign_oca_request DROP COLUMN data_legacy")
+    report = env["sign.oca.request"]._get_data_storage_report()
+    _logger.info(
+        "Moved %s request documents to the filestore, %s of them sharing the "
+        "template file. %s bytes of documents use %s bytes of storage "
+        "(%s bytes saved).",
+        len(request_ids),
+        shared,
+        report["logical_size"],
+        report["stored_size"],
+        report["saved_size"],
+    )
@@ -0,0 +1,12 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo.tools.sql import column_exists, rename_column
+
+
+def migrate(cr, version):
+    # The document of the requests moves to the filestore, keep the column
+    # aside until its content has been moved in post-migration.
+    if column_exists(cr, "sign_oca_request", "data"):
+        rename_column(cr, "sign_oca_request", "data", "data_legacy")
+        cr.execute("ALTER TABLE sign_oca_request ALTER COLUMN data_legacy DROP NOT NULL")
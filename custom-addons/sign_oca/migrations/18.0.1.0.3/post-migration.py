@@ -0,0 +1,46 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import json
+import logging
+
+from odoo import SUPERUSER_ID, api
+from odoo.tools.sql import column_exists
+
+_logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+
+
+def migrate(cr, version):
+    # signatory_data is now computed from sign.oca.request.item
+    if not column_exists(cr, "sign_oca_request", "signatory_data"):
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    item_model = env["sign.oca.request.item"]
+    cr.execute(
+        "SELECT id FROM sign_oca_request WHERE signatory_data IS NOT NULL ORDER BY id"
+    )
+    request_ids = [row[0] for row in cr.fetchall()]
+    count = 0
+    for index in range(0, len(request_ids), BATCH_SIZE):
+        cr.execute(
+            "SELECT id, signatory_data FROM sign_oca_request WHERE id IN %s",
+            (tuple(request_ids[index : index + BATCH_SIZE]),),
+        )
+        vals_list = []
+        for request_id, signatory_data in cr.fetchall():
+            if isinstance(signatory_data, str):
+                signatory_data = json.loads(signatory_data)
+            for key, item_data in (signatory_data or {}).items():
+                vals_list.append(
+                    {
+                        "request_id": request_id,
+                        "item_key": int(key),
+                        "item_data": item_data,
+                    }
+                )
+        item_model.create(vals_list)
+        count += len(vals_list)
+    cr.execute("ALTER TABLE sign_oca_request DROP COLUMN signatory_data")
+    _logger.info("Moved %s sign request items to sign_oca_request_item", count)
@@ -0,0 +1,11 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    # The signing order of the requests already sent is frozen on the signers
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    requests = env["sign.oca.request"].search([("state", "!=", "draft")])
+    requests._assign_signing_sequence()
@@ -0,0 +1,11 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import SUPERUSER_ID, api
+
+
+def migrate(cr, version):
+    # The pages of the requests are read again the first time they are needed
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    templates = env["sign.oca.template"].with_context(active_test=False).search([])
+    templates._update_page_geometry()
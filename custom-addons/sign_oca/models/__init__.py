@@ -1,3 +1,4 @@
+from . import ir_attachment
 from . import res_company
 from . import res_users
 from . import res_partner
@@ -5,4 +6,8 @@ from . import sign_oca_template
 from . import sign_oca_role
 from . import sign_oca_field
 from . import sign_oca_request
-from . import sign_oca_bulk_sign_wizard
\ No newline at end of file
+from . import sign_oca_request_page
+from . import sign_oca_render_job
+from . import sign_oca_chain_audit
+from . import sign_oca_bulk_sign_wizard
+from . import sign_oca_metric
@@ -0,0 +1,72 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, models
+
+
+class IrAttachment(models.Model):
+    _inherit = "ir.attachment"
+
+    def _sign_oca_share(self, vals):
+        """Create an attachment pointing to the same content as ``self``.
+
+        The filestore is addressed by checksum, so the new attachment reuses
+        the stored file as is: nothing is read, encoded or written again.
+        """
+        self.ensure_one()
+        share_vals = {
+            "name": self.name,
+            "mimetype": self.mimetype,
+            "index_content": self.index_content,
+        }
+        share_vals.update(vals)
+        attachment = self.create(share_vals)
+        # create() and write() ignore the content related fields
+        self.flush_recordset(["store_fname", "db_datas", "checksum", "file_size"])
+        self.env.cr.execute(
+            """
+            UPDATE ir_attachment dest
+               SET store_fname = src.store_fname,
+                   db_datas = src.db_datas,
+                   checksum = src.checksum,
+                   file_size = src.file_size
+              FROM ir_attachment src
+             WHERE src.id = %s AND dest.id = %s
+            """,
+            (self.id, attachment.id),
+        )
+        attachment.invalidate_recordset(
+            ["store_fname", "db_datas", "checksum", "file_size", "raw", "datas"]
+        )
+        return attachment
+
+    @api.model
+    def _sign_oca_gc_compose_attachments(self, days=1, limit=10000):
+        """Remove the composer attachments that no message uses.
+
+        Attachments are created with ``res_model="mail.compose.message"``
+        and ``res_id=0`` to be sent by email; the ones never linked to a
+        message (failed sends, abandoned composers) are orphaned.
+        """
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            SELECT att.id
+              FROM ir_attachment att
+             WHERE att.res_model = 'mail.compose.message'
+               AND att.res_id = 0
+               AND att.create_date < (now() at time zone 'UTC') - %s * interval '1 day'
+               AND NOT EXISTS (
+                   SELECT 1
+                     FROM message_attachment_rel rel
+                    WHERE rel.attachment_id = att.id
+               )
+             LIMIT %s
+            """,
+            (days, limit),
+        )
+        attachments = self.browse([row[0] for row in self.env.cr.fetchall()])
+        attachments.unlink()
+        if len(attachments) == limit:
+            self.env.ref("sign_oca.ir_cron_sign_oca_gc_compose_attachments")._trigger()
+        return len(attachments)
@@ -12,3 +12,13 @@ class ResCompany(models.Model):
         help="Once all signers have signed the request, a copy of "
         "the final document will be sent to each of them.",
     )
+    sign_oca_async_rendering = fields.Boolean(
+        string="Render signed documents in background",
+        help="Signatures are recorded immediately and merged into the "
+        "document by a scheduled action, so signers do not wait for it.",
+    )
+    sign_oca_async_hash_chain = fields.Boolean(
+        string="Chain signatures in background",
+        help="Signatures are added to the inalterability chain by a scheduled "
+        "action, so signers do not wait for each other.",
+    )
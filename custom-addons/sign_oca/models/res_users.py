@@ -1,14 +1,56 @@
 # Copyright 2023-2024 Tecnativa - Víctor Martínez
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
+import threading
+import time
+
 from odoo import api, models, modules
 
+# Seconds during which the counters of a user are served from the cache
+USER_COUNT_TTL = 30
+
+_user_count_cache = {}
+_user_count_lock = threading.Lock()
+
+
+def _clear_user_count_cache():
+    with _user_count_lock:
+        _user_count_cache.clear()
+
 
 class ResUsers(models.Model):
     _inherit = "res.users"
 
+    @api.model
+    def _sign_oca_invalidate_request_count(self):
+        """Forget the counters of this worker, a request was sent or signed.
+
+        They are dropped now for this transaction and again once it commits,
+        as a concurrent read may have cached the previous counts meanwhile.
+        The other workers are not notified: they serve their counters for
+        up to ``USER_COUNT_TTL`` seconds.
+        """
+        _clear_user_count_cache()
+        postcommit = self.env.cr.postcommit
+        if not postcommit.data.get("sign_oca.request_count"):
+            postcommit.data["sign_oca.request_count"] = True
+            postcommit.add(_clear_user_count_cache)
+
     @api.model
     def sign_oca_request_user_count(self):
+        """Pending requests of the user by model, cached for
+        ``USER_COUNT_TTL`` seconds by worker."""
+        key = (self.env.cr.dbname, self.env.uid, tuple(self.env.companies.ids))
+        cached = _user_count_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+        result = self._get_sign_oca_request_user_count()
+        with _user_count_lock:
+            _user_count_cache[key] = (time.monotonic() + USER_COUNT_TTL, result)
+        return result
+
+    @api.model
+    def _get_sign_oca_request_user_count(self):
         requests = {}
         domain = [
             ("request_id.state", "=", "sent"),
@@ -19,38 +61,33 @@ class ResUsers(models.Model):
             ),
             ("signed_on", "=", False),
         ]
-        signer_model = self.env["sign.oca.request.signer"]
-        signer_groups = signer_model.read_group(domain, ["model"], ["model"])
-        for signer_group in signer_groups:
-            if signer_group["model"]:
-                model = signer_group["model"]
+        # A single aggregate, the records of each model are then checked at once
+        signer_groups = self.env["sign.oca.request.signer"]._read_group(
+            domain, ["model"], ["__count", "res_id:array_agg"]
+        )
+        for model, count, res_ids in signer_groups:
+            if model:
+                if model not in self.env:
+                    continue
                 Model = self.env[model].with_user(self.env.user)
-                signers = signer_model.search(signer_group.get("__domain"))
-                if signers:
-                    total_records = Model.with_context(active_test=False).search_count(
-                        [("id", "in", signers.mapped("res_id"))]
-                    )
-                    if total_records > 0:
-                        record = self.env[model]
-                        model_id = (
-                            self.env["ir.model"].sudo().search([("model", "=", model)])
-                        )
-                        requests[model] = {
-                            "id": model_id.id,
-                            "name": record._description,
-                            "model": model,
-                            "icon": modules.module.get_module_icon(
-                                record._original_module
-                            ),
-                            "total_records": total_records,
-                        }
+                total_records = Model.with_context(active_test=False).search_count(
+                    [("id", "in", list(set(res_ids)))]
+                )
+                if total_records > 0:
+                    record = self.env[model]
+                    requests[model] = {
+                        "id": self.env["ir.model"]._get_id(model),
+                        "name": record._description,
+                        "model": model,
+                        "icon": modules.module.get_module_icon(record._original_module),
+                        "total_records": total_records,
+                    }
             else:
-                signers = signer_model.search(signer_group.get("__domain"))
                 requests["undefined"] = {
                     "id": False,
                     "name": self.env._("Undefined"),
                     "model": "sign.oca.request",
                     "icon": modules.module.get_module_icon("sign_oca"),
-                    "total_records": len(signers),
+                    "total_records": count,
                 }
         return list(requests.values())
@@ -1,9 +1,17 @@
 from odoo import api, fields, models
 from odoo.exceptions import ValidationError
 import logging
+import multiprocessing
+import os
+from base64 import b64decode
+from concurrent.futures import ProcessPoolExecutor
+
+from ..tools import pdf_render
 
 _logger = logging.getLogger(__name__)
 
+DEFAULT_CHUNK_SIZE = 50
+
 
 class SignOcaBulkSignWizard(models.TransientModel):
     _name = 'sign.oca.bulk.sign.wizard'
@@ -48,50 +56,161 @@ class SignOcaBulkSignWizard(models.TransientModel):
             
         results = {'success': [], 'errors': []}
         current_user = self.env.user
-        
+        to_sign = self.env['sign.oca.request.signer']
         for signer in signers:
-            try:
-                # Kiểm tra signer có thuộc về current user không
-                if signer.partner_id != current_user.partner_id.commercial_partner_id:
-                    _logger.warning("❌ Signer %s: Không thuộc về user %s", 
-                                    signer.id, current_user.name)
-                    results['errors'].append(f"{signer.request_id.name}: Không phải signer của bạn")
-                    continue
+            # Kiểm tra signer có thuộc về current user không
+            if signer.partner_id != current_user.partner_id.commercial_partner_id:
+                _logger.warning("❌ Signer %s: Không thuộc về user %s", 
+                                signer.id, current_user.name)
+                results['errors'].append(f"{signer.request_id.name}: Không phải signer của bạn")
+                continue
+            to_sign |= signer
+
+        workers = self._get_bulk_sign_workers()
+        executor = None
+        if workers > 1 and len(to_sign) > 1:
+            # Opt-in: forking a threaded server is only safe when the
+            # deployment is known to support it. Workers only receive and
+            # return bytes, fork keeps the fonts registered by this process
+            executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=pdf_render.enable_image_cache,
+            )
+        try:
+            with pdf_render.image_cache():
+                for chunk in self._get_bulk_sign_chunks(to_sign):
+                    self._bulk_sign_chunk(chunk, executor, results)
+                    if not self.env.registry.in_test_mode():
+                        self.env.cr.commit()  # pylint: disable=invalid-commit
+        finally:
+            if executor:
+                executor.shutdown()
+
+        return self._show_results(results)
+
+    def _get_bulk_sign_workers(self):
+        """Number of processes rendering the documents, ``1`` (in process)
+        unless the system parameter ``sign_oca.bulk_sign_workers`` is set."""
+        workers = int(
+            self.env['ir.config_parameter'].sudo().get_param('sign_oca.bulk_sign_workers', 1)
+        )
+        return max(1, min(workers, os.cpu_count() or 1))
+
+    def _get_bulk_sign_chunk_size(self):
+        chunk_size = int(
+            self.env['ir.config_parameter'].sudo().get_param('sign_oca.bulk_sign_chunk_size', 0)
+        )
+        return chunk_size or DEFAULT_CHUNK_SIZE
+
+    def _get_bulk_sign_chunks(self, signers):
+        """Yield the signers by chunks written in their own transaction.
+
+        A chunk holds at most one signer per request: the next signer of a
+        request can only sign once the previous one is in the document.
+        """
+        chunk_size = self._get_bulk_sign_chunk_size()
+        pending = signers.sorted(lambda s: (s.request_id.id, s.signing_sequence))
+        while pending:
+            chunk = signers.browse()
+            for signer in pending:
+                if len(chunk) >= chunk_size:
+                    break
+                if signer.request_id not in chunk.request_id:
+                    chunk |= signer
+            pending -= chunk
+            yield chunk
 
+    def _bulk_sign_chunk(self, signers, executor, results):
+        """Sign ``signers``: their documents are rendered by ``executor``
+        when possible, then the results are written one document at a time.
+        """
+        prepared = {}
+        for signer in signers:
+            try:
                 if not signer.is_allow_signature:
                     _logger.warning("⏩ Signer %s: Chưa đến lượt ký", signer.id)
                     results['errors'].append(f"{signer.request_id.name}: Chưa đến lượt ký")
                     continue
+                signer._check_can_sign()
+                _logger.debug("Signer %s: Đang build items cho request %s",
+                              signer.id, signer.request_id.name)
+                signatory_data = signer._prepare_signatory_data(
+                    self._build_items_for_signer(signer)
+                )
+            except Exception as e:
+                _logger.error("❌ Error signing signer %s: %s", signer.id, str(e))
+                results['errors'].append(f"{signer.request_id.name}: {str(e)}")
+                continue
+            prepared[signer] = (signatory_data, signer._get_items_to_render(signatory_data))
 
-                _logger.warning("✅ Signer %s: Đang build items cho request %s", 
-                               signer.id, signer.request_id.name)
-                items = self._build_items_for_signer(signer)
-                signer.action_sign(items, access_token=False)
-                results['success'].append(signer.request_id.name)
+        outputs = {}
+        to_fork = [
+            signer
+            for signer, (_signatory_data, to_render) in prepared.items()
+            if pdf_render.can_render(to_render)
+        ]
+        if executor and len(to_fork) > 1:
+            tasks = [
+                (
+                    signer.id,
+                    b64decode(signer.request_id.data),
+                    prepared[signer][1],
+                    (
+                        signer.request_id.template_id.font_family,
+                        signer.request_id.template_id.font_size,
+                    ),
+                    signer.request_id._get_page_geometry(),
+                )
+                for signer in to_fork
+            ]
+            for signer_id, data, rendered, error in executor.map(
+                pdf_render.render_document, tasks
+            ):
+                outputs[signer_id] = (data, rendered, error)
 
+        for signer, (signatory_data, to_render) in prepared.items():
+            try:
+                with self.env.cr.savepoint():
+                    signer.signed_on = fields.Datetime.now()
+                    if signer.id in outputs:
+                        data, rendered, error = outputs[signer.id]
+                        if error:
+                            raise ValidationError(error)
+                        rendered = [to_render[index] for index in rendered]
+                    else:
+                        with signer.request_id._get_document() as (pdf_data, reader):
+                            data, rendered = signer._render_pdf_data(
+                                pdf_data,
+                                to_render,
+                                boxes=signer.request_id._get_page_boxes(),
+                                reader=reader,
+                            )
+                    signer._write_signed_data(signatory_data, data, rendered)
+                    signer._finalize_signature(log=True)
+                results['success'].append(signer.request_id.name)
             except Exception as e:
                 _logger.error("❌ Error signing signer %s: %s", signer.id, str(e))
                 results['errors'].append(f"{signer.request_id.name}: {str(e)}")
 
-        return self._show_results(results)
-    
     def _build_items_for_signer(self, signer):
         """Build items cho 1 signer cụ thể"""
         items = {}
         request = signer.request_id
 
-        for key, item_data in request.signatory_data.items():
-            if item_data.get('role_id') == signer.role_id.id:
-                items[key] = item_data.copy()
-
-                if item_data.get('field_type') == 'signature':
-                    sig = self.signature_image
-                    if sig and sig.startswith("data:image"):
-                        sig = sig.split(",", 1)[1]
-                    items[key]['value'] = sig
-                    _logger.warning("⚡ Cleaned signature base64 (len=%s)", len(sig))
-                elif not items[key].get('value'):
-                    items[key]['value'] = item_data.get('default_value', '')
+        for item in request._get_role_items(signer.role_id):
+            key = str(item.item_key)
+            item_data = item.item_data
+            items[key] = item_data.copy()
+
+            if item_data.get('field_type') == 'signature':
+                sig = self.signature_image
+                if sig and sig.startswith("data:image"):
+                    sig = sig.split(",", 1)[1]
+                items[key]['value'] = sig
+                _logger.warning("⚡ Cleaned signature base64 (len=%s)", len(sig))
+            elif not items[key].get('value'):
+                items[key]['value'] = item_data.get('default_value', '')
 
         return items
     
@@ -0,0 +1,96 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+
+
+class SignOcaChainAudit(models.Model):
+    """Verification of the inalterability chains of the signers."""
+
+    _name = "sign.oca.chain.audit"
+    _description = "Sign Chain Audit"
+    _inherit = ["mail.thread"]
+    _order = "date desc, id desc"
+
+    date = fields.Datetime(required=True, readonly=True, default=fields.Datetime.now)
+    state = fields.Selection(
+        [("valid", "Valid"), ("altered", "Altered")], required=True, readonly=True
+    )
+    checked_count = fields.Integer(string="Checked signatures", readonly=True)
+    altered_count = fields.Integer(string="Altered signatures", readonly=True)
+    gap_count = fields.Integer(string="Missing numbers", readonly=True)
+    line_ids = fields.One2many(
+        "sign.oca.chain.audit.line", inverse_name="audit_id", readonly=True
+    )
+
+    def _compute_display_name(self):
+        for audit in self:
+            audit.display_name = self.env._(
+                "Audit of %(date)s", date=fields.Datetime.to_string(audit.date)
+            )
+
+    @api.model
+    def _run_audit(self):
+        signers = self.env["sign.oca.request.signer"].sudo()
+        lines = [
+            {
+                "signer_id": signer.id,
+                "sequence_id": signer.sequence_id.id,
+                "secure_sequence_number": signer.secure_sequence_number,
+                "issue": issue,
+            }
+            for signer, issue in signers._verify_chains()
+        ]
+        altered_count = sum(1 for line in lines if line["issue"] == "altered")
+        return self.sudo().create(
+            {
+                "state": "altered" if lines else "valid",
+                "checked_count": signers.search_count(
+                    [("secure_sequence_number", "!=", 0)]
+                ),
+                "altered_count": altered_count,
+                "gap_count": len(lines) - altered_count,
+                "line_ids": [fields.Command.create(line) for line in lines],
+            }
+        )
+
+    @api.model
+    def action_run_audit(self):
+        audit = self._run_audit()
+        return {
+            "type": "ir.actions.act_window",
+            "res_model": self._name,
+            "res_id": audit.id,
+            "view_mode": "form",
+        }
+
+    @api.model
+    def _cron_run_audit(self):
+        audit = self._run_audit()
+        if audit.state == "altered":
+            audit.message_post(
+                body=self.env._(
+                    "%(altered)s altered signatures and %(gaps)s missing numbers "
+                    "found in the inalterability chains.",
+                    altered=audit.altered_count,
+                    gaps=audit.gap_count,
+                )
+            )
+
+
+class SignOcaChainAuditLine(models.Model):
+    _name = "sign.oca.chain.audit.line"
+    _description = "Sign Chain Audit Issue"
+    _order = "audit_id, sequence_id, secure_sequence_number"
+
+    audit_id = fields.Many2one(
+        "sign.oca.chain.audit", required=True, ondelete="cascade", index=True
+    )
+    signer_id = fields.Many2one("sign.oca.request.signer", ondelete="set null")
+    request_id = fields.Many2one(related="signer_id.request_id")
+    sequence_id = fields.Many2one("ir.sequence", ondelete="set null")
+    secure_sequence_number = fields.Integer()
+    issue = fields.Selection(
+        [("altered", "Altered signature"), ("gap", "Missing previous number")],
+        required=True,
+    )
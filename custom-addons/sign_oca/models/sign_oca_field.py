@@ -2,7 +2,7 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 import logging
-from odoo import fields, models, api
+from odoo import fields, models, api, tools
 
 _logger = logging.getLogger(__name__)
 
@@ -53,7 +53,7 @@ class SignOcaField(models.Model):
                         field_label = f"{field_obj.string} ({model_display})"
                         selection.append((field_key, field_label))
             except Exception as e:
-                _logger.warning(f"Error loading fields from {model_name}: {e}")
+                _logger.warning("Error loading fields from %s: %s", model_name, e)
                 continue
         
         return sorted(selection, key=lambda x: x[1])
@@ -72,33 +72,182 @@ class SignOcaField(models.Model):
             return model_name, field_name
         return None, None
 
+    def _extract_values_from_records(self, records, role=None, role_partners=None):
+        """Batched ``extract_value_from_record`` over ``records``.
+
+        Returns ``{record_id: value}`` with the same values as calling
+        ``extract_value_from_record(record, role_context)`` for each record,
+        but the employee of each partner is searched once and every
+        relation path is read for all the records at once.
+        ``role_partners`` is the result of ``role._get_partners_from_records``
+        when it is already known.
+        """
+        self.ensure_one()
+        role_context = None
+        if role:
+            role_context = {"role_id": role.id, "role_name": role.name}
+        if (
+            self.field_type != "auto_fill"
+            or not self.hr_field_selection
+            or self.hr_field_selection == "hr.contract.date_end"
+        ):
+            return {
+                record.id: self.extract_value_from_record(record, role_context)
+                for record in records
+            }
+        target_model, target_field = self.get_auto_fill_model_field()
+        if not target_model or not target_field:
+            return {record.id: self.default_value or "" for record in records}
+
+        # Record to read the value from, False when there is nothing to read
+        sources = {record.id: record for record in records}
+        # Records whose source is a partner of the role, read through its
+        # employee; the other ones are read directly
+        role_sources = set()
+        partner = role.default_partner_id if role else False
+        if partner and role.partner_selection_policy == "default":
+            sources = dict.fromkeys(records.ids, partner)
+            role_sources = set(records.ids)
+        elif partner and role.partner_selection_policy == "expression":
+            if role_partners is None:
+                role_partners = role._get_partners_from_records(records)
+            for record in records:
+                partner_id = role_partners.get(record.id)
+                if partner_id:
+                    sources[record.id] = self.env["res.partner"].browse(partner_id)
+                    role_sources.add(record.id)
+        partners = self.env["res.partner"].union(
+            *[sources[key] for key in role_sources]
+        )
+        if partners:
+            employees = self._get_partner_employees(partners)
+            for key, source in list(sources.items()):
+                if key not in role_sources:
+                    continue
+                if employees.get(source.id, False) is None:
+                    # The search failed, extract_value_from_record falls
+                    # back to the default value
+                    del sources[key]
+                else:
+                    sources[key] = employees.get(source.id, False)
+        self._prefetch_auto_fill_sources(
+            [source for source in sources.values() if source],
+            target_model,
+            target_field,
+        )
+
+        values = {}
+        by_source = {}
+        for record in records:
+            if record.id not in sources:
+                values[record.id] = self.default_value or ""
+                continue
+            source = sources[record.id]
+            if not source:
+                values[record.id] = ""
+                continue
+            key = (source._name, source.id)
+            if key not in by_source:
+                try:
+                    by_source[key] = self._extract_from_source_record(
+                        source, target_model, target_field
+                    )
+                except Exception as e:
+                    _logger.error(
+                        "Auto fill error for field %s (%s): %s",
+                        self.name,
+                        self.hr_field_selection,
+                        e,
+                    )
+                    by_source[key] = self.default_value or ""
+            values[record.id] = by_source[key]
+        return values
+
+    @api.model
+    def _get_partner_employees(self, partners):
+        """Return ``{partner_id: employee}`` as ``_extract_from_role_partner``
+        finds them, with one search per criteria for all ``partners``.
+
+        Partners whose search failed are mapped to ``None``.
+        """
+        employees = {}
+        for employee in self.env["hr.employee"].search(
+            [("user_id.partner_id", "in", partners.ids)]
+        ):
+            employees.setdefault(employee.user_id.partner_id.id, employee)
+        missing = partners.filtered(lambda p: p.id not in employees)
+        if missing:
+            try:
+                found = self.env["hr.employee"].search(
+                    [("address_home_id", "in", missing.ids)]
+                )
+            except Exception as e:
+                _logger.error("Employee search failed: %s", e)
+                employees.update(dict.fromkeys(missing.ids))
+                return employees
+            for employee in found:
+                employees.setdefault(employee.address_home_id.id, employee)
+        return employees
+
+    @api.model
+    def _prefetch_auto_fill_sources(self, sources, target_model, target_field):
+        """Read ``target_field`` through the relation paths used by
+        ``_extract_from_source_record`` for all ``sources`` at once."""
+        by_model = {}
+        for source in sources:
+            by_model.setdefault(source._name, set()).add(source.id)
+        for model_name, ids in by_model.items():
+            records = self.env[model_name].browse(ids)
+            if model_name == target_model:
+                if target_field in records._fields:
+                    records.mapped(target_field)
+                continue
+            for field_name in self._get_relation_fields(model_name, target_model):
+                related = records.mapped(field_name)
+                if related and target_field in related._fields:
+                    related.mapped(target_field)
+
+    @api.model
+    @tools.ormcache("model_name", "target_model")
+    def _get_relation_fields(self, model_name, target_model):
+        return tuple(
+            field_name
+            for field_name, field in self.env[model_name]._fields.items()
+            if field.comodel_name == target_model
+        )
+
     def extract_value_from_record(self, source_record, role_context=None):
         """Extract value from source record or role partner based on context"""
         self.ensure_one()
         
-        _logger.info(f"=== EXTRACT DEBUG ===")
-        _logger.info(f"Field: {self.name}")
-        _logger.info(f"Field type: {self.field_type}")
-        _logger.info(f"HR selection: {self.hr_field_selection}")
-        _logger.info(f"Source record: {source_record._name}({source_record.id})")
+        _logger.debug(
+            "Extracting %s (%s, %s) from %s",
+            self.name,
+            self.field_type,
+            self.hr_field_selection,
+            source_record,
+        )
         
         # Early return for non-auto-fill fields
         if self.field_type != 'auto_fill' or not self.hr_field_selection:
             result = self.default_value or ""
-            _logger.info(f"Early return: {result}")
+            _logger.debug("Early return: %s", result)
             return result
             
         # Special handling for computed fields
         if self.hr_field_selection == 'hr.contract.date_end':
             result = self._compute_contract_date_end(source_record, role_context)
-            _logger.info(f"Contract date end: {result}")
+            _logger.debug("Contract date end: %s", result)
             return result
         
         target_model, target_field = self.get_auto_fill_model_field()
-        _logger.info(f"Target: {target_model}.{target_field}")
+        _logger.debug("Target: %s.%s", target_model, target_field)
         
         if not target_model or not target_field:
-            _logger.warning(f"Invalid hr_field_selection format: {self.hr_field_selection}")
+            _logger.warning(
+                "Invalid hr_field_selection format: %s",
+                self.hr_field_selection,
+            )
             return self.default_value or ""
         
         try:
@@ -108,30 +257,39 @@ class SignOcaField(models.Model):
                 partner = role.default_partner_id
                 
                 if partner and role.partner_selection_policy == 'default':
-                    _logger.info(f"Using role-based auto-fill: Role '{role.name}' -> Partner '{partner.name}'")
+                    _logger.debug(
+                        "Using role-based auto-fill: Role %r -> Partner %r",
+                        role.name,
+                        partner.name,
+                    )
                     result = self._extract_from_role_partner(partner, target_model, target_field)
-                    _logger.info(f"Role-based result: {result}")
+                    _logger.debug("Role-based result: %s", result)
                     return result
                     
                 elif partner and role.partner_selection_policy == 'expression' and source_record:
                     partner_id = role._get_partner_from_record(source_record)
                     if partner_id:
                         partner = self.env['res.partner'].browse(partner_id)
-                        _logger.info(f"Using expression-based role auto-fill: Partner '{partner.name}'")
+                        _logger.debug(
+                            "Using expression-based role auto-fill: Partner %r",
+                            partner.name,
+                        )
                         result = self._extract_from_role_partner(partner, target_model, target_field)
-                        _logger.info(f"Expression-based result: {result}")
+                        _logger.debug("Expression-based result: %s", result)
                         return result
             
             # Fallback to source record
-            _logger.info(f"Using source_record based auto-fill")
+            _logger.debug("Using source_record based auto-fill")
             result = self._extract_from_source_record(source_record, target_model, target_field)
-            _logger.info(f"Source-based result: {result}")
+            _logger.debug("Source-based result: %s", result)
             return result
             
-        except Exception as e:
-            _logger.error(f"Auto fill error for field {self.name} ({self.hr_field_selection}): {e}")
-            import traceback
-            _logger.error(traceback.format_exc())
+        except Exception:
+            _logger.exception(
+                "Auto fill error for field %s (%s)",
+                self.name,
+                self.hr_field_selection,
+            )
             return self.default_value or ""
 
 
@@ -147,7 +305,7 @@ class SignOcaField(models.Model):
             employee = self.env['hr.employee'].search([('address_home_id', '=', partner.id)], limit=1)
         
         if not employee:
-            _logger.warning(f"No employee found for partner {partner.name}")
+            _logger.warning("No employee found for partner %s", partner.name)
             return ""
         
         # Now extract the field from employee context
@@ -159,7 +317,7 @@ class SignOcaField(models.Model):
             
         if target_model == source_record._name:
             value = getattr(source_record, target_field, None)
-            _logger.debug(f"Direct access - Field: {target_field}, Value: {value}")
+            _logger.debug("Direct access - Field: %s, Value: %s", target_field, value)
 
             if value is None:
                 return self.default_value or ""
@@ -200,7 +358,7 @@ class SignOcaField(models.Model):
             return str(value) if value else (self.default_value or "")
 
         except Exception as e:
-            _logger.warning(f"Error formatting recordset value {value}: {e}")
+            _logger.warning("Error formatting recordset value %s: %s", value, e)
             return self.default_value or ""
 
     def _get_record_display_value(self, record):
@@ -216,7 +374,7 @@ class SignOcaField(models.Model):
             else:
                 return f"ID: {record.id}"
         except Exception as e:
-            _logger.warning(f"Error getting display value for record {record}: {e}")
+            _logger.warning("Error getting display value for record %s: %s", record, e)
             try:
                 return f"ID: {record.id}"
             except:
@@ -240,24 +398,37 @@ class SignOcaField(models.Model):
                     
                     if employee:
                         work_record = employee
-                        _logger.info(f"Using employee from role for date computation: {employee.name}")
+                        _logger.debug(
+                            "Using employee from role for date computation: %s",
+                            employee.name,
+                        )
             
             # Get official_date from employee
             official_date = None
             source_model = work_record._name
             
-            _logger.debug(f"Computing contract end date using official_date for {source_model}({work_record.id})")
+            _logger.debug(
+                "Computing contract end date using official_date for %s(%s)",
+                source_model,
+                work_record.id,
+            )
             
             if source_model == 'hr.employee':
                 # Direct access to employee's official_date
                 official_date = work_record.official_date
-                _logger.debug(f"Direct employee access - official_date: {official_date}")
+                _logger.debug(
+                    "Direct employee access - official_date: %s",
+                    official_date,
+                )
                 
             elif source_model == 'hr.contract':
                 # Get employee from contract and then official_date
                 if work_record.employee_id:
                     official_date = work_record.employee_id.official_date
-                    _logger.debug(f"Contract's employee official_date: {official_date}")
+                    _logger.debug(
+                        "Contract's employee official_date: %s",
+                        official_date,
+                    )
                 else:
                     _logger.warning("Contract has no employee_id")
                     return ""
@@ -266,10 +437,10 @@ class SignOcaField(models.Model):
                 # Try to find related employee and get official_date
                 official_date_str = self._find_related_field_value(work_record, 'hr.employee', 'official_date')
                 if not official_date_str:
-                    _logger.warning(f"No related employee found for {source_model}")
+                    _logger.warning("No related employee found for %s", source_model)
                     return ""
                 official_date = official_date_str
-                _logger.debug(f"Related employee official_date: {official_date}")
+                _logger.debug("Related employee official_date: %s", official_date)
             
             # Validate official_date
             if not official_date:
@@ -283,7 +454,7 @@ class SignOcaField(models.Model):
             elif hasattr(official_date, 'date'):
                 official_date = official_date.date()
             
-            _logger.debug(f"Parsed official_date: {official_date}")
+            _logger.debug("Parsed official_date: %s", official_date)
             
             # Get template duration
             template_item = self.env['sign.oca.template.item'].search([('field_id', '=', self.id)], limit=1)
@@ -293,95 +464,123 @@ class SignOcaField(models.Model):
                 
             template = template_item.template_id
             if not template.contract_type_id or not template.contract_type_id.duration_months:
-                _logger.warning(f"No contract_type or duration_months configured in template '{template.name}'")
+                _logger.warning(
+                    "No contract_type or duration_months configured in template %r",
+                    template.name,
+                )
                 return ""
                 
             duration_months = template.contract_type_id.duration_months
-            _logger.debug(f"Template duration: {duration_months} months")
+            _logger.debug("Template duration: %s months", duration_months)
             
             # Calculate end date using official_date + duration
             from dateutil.relativedelta import relativedelta
             end_date = official_date + relativedelta(months=duration_months)
             result = end_date.strftime('%d/%m/%Y')
             
-            _logger.info(f"Calculated contract end date: {official_date} + {duration_months} months = {result}")
+            _logger.debug(
+                "Calculated contract end date: %s + %s months = %s",
+                official_date,
+                duration_months,
+                result,
+            )
             return result
                 
-        except Exception as e:
-            _logger.error(f"Contract end date computation error: {e}")
-            import traceback
-            _logger.error(traceback.format_exc())
+        except Exception:
+            _logger.exception("Contract end date computation error")
             return ""
     def _find_related_field_value(self, source_record, target_model, target_field):
         """Find value in related models with optimized search - FIXED CONTRACT LOGIC"""
         
-        _logger.info(f"=== FIND RELATED DEBUG ===")
-        _logger.info(f"Source: {source_record._name}({source_record.id})")
-        _logger.info(f"Target: {target_model}.{target_field}")
+        _logger.debug(
+            "Finding %s.%s from %s", target_model, target_field, source_record
+        )
         
-        # Cache field mappings for performance
-        relation_fields = []
-        for field_name, field_obj in source_record._fields.items():
-            if field_obj.comodel_name == target_model:
-                relation_fields.append((field_name, field_obj))
-                _logger.info(f"Found relation field: {field_name} -> {target_model}")
+        relation_fields = [
+            (field_name, source_record._fields[field_name])
+            for field_name in self._get_relation_fields(source_record._name, target_model)
+        ]
         
         if not relation_fields:
-            _logger.debug(f"No relation found from {source_record._name} to {target_model}")
+            _logger.debug(
+                "No relation found from %s to %s",
+                source_record._name,
+                target_model,
+            )
             return ""
         
         # Process relation fields
         for field_name, field_obj in relation_fields:
             related_records = getattr(source_record, field_name, False)
-            _logger.info(f"Processing field: {field_name}, records: {related_records}")
+            _logger.debug(
+                "Processing field: %s, records: %s",
+                field_name,
+                related_records,
+            )
             
             if not related_records:
-                _logger.info(f"No records in {field_name}")
+                _logger.debug("No records in %s", field_name)
                 continue
                 
             try:
                 # Many2one: get first record
                 if field_obj.type == 'many2one':
                     raw_value = getattr(related_records, target_field, "")
-                    _logger.info(f"Many2one raw value: {raw_value} (type: {type(raw_value)})")
+                    _logger.debug(
+                        "Many2one raw value: %s (type: %s)",
+                        raw_value,
+                        type(raw_value),
+                    )
                     
                     # FIXED: Format the value properly
                     formatted_value = self._format_recordset_value(raw_value)
-                    _logger.info(f"Many2one formatted value: {formatted_value}")
+                    _logger.debug("Many2one formatted value: %s", formatted_value)
                     
                     if formatted_value and formatted_value != (self.default_value or ""):
                         return formatted_value
                 
                 # One2many/Many2many: SPECIAL LOGIC FOR CONTRACTS
                 elif field_obj.type in ['one2many', 'many2many']:
-                    _logger.info(f"Processing {field_obj.type} field: {field_name}")
+                    _logger.debug("Processing %s field: %s", field_obj.type, field_name)
                     
                     # Special handling for hr.contract
                     if target_model == 'hr.contract':
                         result = self._get_best_contract_value(related_records, target_field)
-                        _logger.info(f"Contract result: {result}")
+                        _logger.debug("Contract result: %s", result)
                         return result
                     
                     # Default logic for other models
                     else:
                         for i, record in enumerate(related_records[:5]):  # Limit to first 5 records for performance
                             raw_value = getattr(record, target_field, "")
-                            _logger.info(f"Record {i} raw value: {raw_value} (type: {type(raw_value)})")
+                            _logger.debug(
+                                "Record %s raw value: %s (type: %s)",
+                                i,
+                                raw_value,
+                                type(raw_value),
+                            )
                             
                             # FIXED: Format the value properly
                             formatted_value = self._format_recordset_value(raw_value)
-                            _logger.info(f"Record {i} formatted value: {formatted_value}")
+                            _logger.debug(
+                                "Record %s formatted value: %s",
+                                i,
+                                formatted_value,
+                            )
                             
                             if formatted_value and formatted_value != (self.default_value or ""):
                                 return formatted_value
                                 
-            except Exception as e:
-                _logger.warning(f"Error accessing field {target_field} in {field_name}: {e}")
-                import traceback
-                _logger.error(traceback.format_exc())
+            except Exception:
+                _logger.warning(
+                    "Error accessing field %s in %s",
+                    target_field,
+                    field_name,
+                    exc_info=True,
+                )
                 continue
         
-        _logger.info("No value found, returning empty")
+        _logger.debug("No value found, returning empty")
         return ""
     def _get_best_contract_value(self, contracts, target_field):
         """Get value from best available contract with priority logic"""
@@ -395,7 +594,12 @@ class SignOcaField(models.Model):
             latest_contract = running_contracts.sorted('date_start', reverse=True)[0]
             value = getattr(latest_contract, target_field, "")
             if value:
-                _logger.debug(f"Using running contract {latest_contract.id}: {target_field} = {value}")
+                _logger.debug(
+                    "Using running contract %s: %s = %s",
+                    latest_contract.id,
+                    target_field,
+                    value,
+                )
                 return str(value)
         
         # Priority 2: Draft contracts (state = 'draft') 
@@ -405,7 +609,12 @@ class SignOcaField(models.Model):
             latest_contract = draft_contracts.sorted('date_start', reverse=True)[0] 
             value = getattr(latest_contract, target_field, "")
             if value:
-                _logger.debug(f"Using draft contract {latest_contract.id}: {target_field} = {value}")
+                _logger.debug(
+                    "Using draft contract %s: %s = %s",
+                    latest_contract.id,
+                    target_field,
+                    value,
+                )
                 return str(value)
         
         # Priority 3: Any other contract
@@ -413,8 +622,13 @@ class SignOcaField(models.Model):
             latest_contract = contracts.sorted('date_start', reverse=True)[0]
             value = getattr(latest_contract, target_field, "")
             if value:
-                _logger.debug(f"Using fallback contract {latest_contract.id}: {target_field} = {value}")
+                _logger.debug(
+                    "Using fallback contract %s: %s = %s",
+                    latest_contract.id,
+                    target_field,
+                    value,
+                )
                 return str(value)
         
-        _logger.warning(f"No suitable contract found for field {target_field}")
+        _logger.warning("No suitable contract found for field %s", target_field)
         return ""
\ No newline at end of file
@@ -0,0 +1,100 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from odoo import api, fields, models
+
+from ..tools import pdf_cache
+
+
+class SignOcaMetric(models.Model):
+    """Duration of the signatures.
+
+    Recorded by default; the setting "Record signing metrics" (system
+    parameter ``sign_oca.collect_metrics`` set to ``0``) turns it off. The
+    autovacuum removes the metrics older than ``_retention_days``.
+    """
+
+    _name = "sign.oca.metric"
+    _description = "Sign Metric"
+    _log_access = False
+    _order = "date desc, id desc"
+
+    _retention_days = 90
+
+    date = fields.Datetime(required=True, readonly=True, index=True)
+    template_id = fields.Many2one(
+        "sign.oca.template", readonly=True, ondelete="set null", index=True
+    )
+    request_id = fields.Many2one("sign.oca.request", readonly=True, ondelete="set null")
+    duration = fields.Float(string="Duration (ms)", readonly=True, aggregator="avg")
+    query_count = fields.Integer(readonly=True, aggregator="avg")
+    span_data = fields.Serialized(readonly=True)
+
+    @api.model
+    def _is_enabled(self):
+        return (
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("sign_oca.collect_metrics", "1")
+            != "0"
+        )
+
+    @api.model
+    def _record(self, request, collector):
+        if not self._is_enabled():
+            return self
+        return self.sudo().create(
+            {
+                "date": fields.Datetime.now(),
+                "template_id": request.template_id.id,
+                "request_id": request.id,
+                "duration": collector.duration,
+                "query_count": collector.query_count,
+                "span_data": collector.get_spans(),
+            }
+        )
+
+    @api.model
+    def get_latency_stats(self, days=30):
+        """Median and 95th percentile of the duration of the signatures of
+        the last ``days``, by template, and the state of the document cache
+        of this worker."""
+        self.flush_model()
+        self.env.cr.execute(
+            """
+            SELECT template_id,
+                   COUNT(*),
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY duration),
+                   percentile_cont(0.95) WITHIN GROUP (ORDER BY duration),
+                   AVG(query_count)
+              FROM sign_oca_metric
+             WHERE date >= (now() at time zone 'UTC') - %s * interval '1 day'
+             GROUP BY template_id
+            """,
+            (days,),
+        )
+        templates = []
+        for template_id, count, p50, p95, queries in self.env.cr.fetchall():
+            templates.append(
+                {
+                    "template_id": template_id,
+                    "count": count,
+                    "p50": p50,
+                    "p95": p95,
+                    "query_count": float(queries),
+                }
+            )
+        return {
+            "templates": templates,
+            "reader_cache": pdf_cache.reader_cache.get_stats(),
+        }
+
+    @api.autovacuum
+    def _gc_metrics(self):
+        self.env.cr.execute(
+            """
+            DELETE FROM sign_oca_metric
+             WHERE date < (now() at time zone 'UTC') - %s * interval '1 day'
+            """,
+            (self._retention_days,),
+        )
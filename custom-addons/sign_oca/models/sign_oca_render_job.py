@@ -0,0 +1,115 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import logging
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+
+class SignOcaRenderJob(models.Model):
+    """PDF rendering postponed out of the HTTP request.
+
+    Jobs are consumed in creation order by a cron. A job is never processed
+    while an older job of the same request is still pending, so the document
+    is always built in the order the actions happened.
+    """
+
+    _name = "sign.oca.render.job"
+    _description = "Sign Render Job"
+    _order = "id"
+
+    _max_attempts = 3
+
+    request_id = fields.Many2one(
+        "sign.oca.request", required=True, ondelete="cascade", index=True
+    )
+    signer_id = fields.Many2one("sign.oca.request.signer", ondelete="cascade")
+    job_type = fields.Selection(
+        [("send", "Render auto fill fields"), ("sign", "Render signature")],
+        required=True,
+    )
+    state = fields.Selection(
+        [("pending", "Pending"), ("done", "Done"), ("failed", "Failed")],
+        default="pending",
+        required=True,
+        index=True,
+    )
+    attempts = fields.Integer(readonly=True)
+    error = fields.Text(readonly=True)
+    access_token = fields.Char()
+    company_id = fields.Many2one(related="request_id.company_id")
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        jobs = super().create(vals_list)
+        if jobs:
+            self.env.ref("sign_oca.ir_cron_sign_oca_render_job")._trigger()
+        return jobs
+
+    def _process(self):
+        self.ensure_one()
+        if self.job_type == "send":
+            self.request_id._render_auto_fill_fields()
+        elif self.job_type == "sign":
+            self.signer_id._render_signature()
+            self.signer_id._finalize_signature(access_token=self.access_token)
+
+    def _run(self):
+        for job in self:
+            try:
+                with self.env.cr.savepoint():
+                    job._process()
+                    job.state = "done"
+            except Exception as e:
+                _logger.exception("Sign render job %s failed", job.id)
+                job.attempts += 1
+                job.error = str(e)
+                if job.attempts < self._max_attempts:
+                    # Retried on the next run of the cron
+                    continue
+                job.state = "failed"
+                job.request_id.message_post(
+                    body=self.env._(
+                        "The document could not be rendered: %(error)s",
+                        error=job.error,
+                    )
+                )
+
+    @api.model
+    def _get_runnable_jobs(self, limit):
+        """Oldest pending jobs without an older pending or failed job of
+        the same request, so blocked requests never hide runnable ones."""
+        self.flush_model(["request_id", "state"])
+        self.env.cr.execute(
+            """
+            SELECT job.id
+              FROM sign_oca_render_job job
+             WHERE job.state = 'pending'
+               AND NOT EXISTS (
+                   SELECT 1
+                     FROM sign_oca_render_job older
+                    WHERE older.request_id = job.request_id
+                      AND older.state IN ('pending', 'failed')
+                      AND older.id < job.id
+               )
+             ORDER BY job.id
+             LIMIT %s
+            """,
+            (limit,),
+        )
+        return self.browse([row[0] for row in self.env.cr.fetchall()])
+
+    def action_retry(self):
+        self.write({"state": "pending", "attempts": 0, "error": False})
+
+    @api.model
+    def _cron_process_jobs(self, limit=50):
+        jobs = self._get_runnable_jobs(limit)
+        for job in jobs:
+            job._run()
+            if not self.env.registry.in_test_mode():
+                self.env.cr.commit()  # pylint: disable=invalid-commit
+        if len(jobs) == limit:
+            self.env.ref("sign_oca.ir_cron_sign_oca_render_job")._trigger()
@@ -5,40 +5,25 @@ import hashlib
 import json
 import logging
 from base64 import b64decode, b64encode
+from datetime import timedelta
 from hashlib import sha256
 from io import BytesIO
-from reportlab.lib import colors
-
-from PyPDF2 import PdfFileReader, PdfFileWriter
-from reportlab.graphics.shapes import Drawing, Line, Rect
-from reportlab.lib.colors import black, transparent
-from reportlab.lib.styles import ParagraphStyle
-from reportlab.pdfgen import canvas
-from reportlab.platypus import Image, Paragraph
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfbase.pdfmetrics import registerFontFamily
+
+from PyPDF2 import PdfFileReader
 
 from odoo import api, fields, models
 from odoo.exceptions import UserError, ValidationError
 from odoo.http import request
 from odoo.tools import float_repr
+from odoo.tools.sql import create_index
 
-_logger = logging.getLogger(__name__)
+from ..tools import instrumentation, pdf_cache, pdf_incremental, pdf_render
 
-pdfmetrics.registerFont(TTFont("DejaVuSans", "/home/nk/odoo-dev/custom-addons/sign_oca/data/DejaVuSans.ttf"))
-pdfmetrics.registerFont(TTFont("DejaVuSans-Bold", "/home/nk/odoo-dev/custom-addons/sign_oca/data/DejaVuSans-Bold.ttf"))
-pdfmetrics.registerFont(TTFont("DejaVuSans-Oblique", "/home/nk/odoo-dev/custom-addons/sign_oca/data/DejaVuSans-Oblique.ttf"))
-pdfmetrics.registerFont(TTFont("DejaVuSans-BoldOblique", "/home/nk/odoo-dev/custom-addons/sign_oca/data/DejaVuSans-BoldOblique.ttf"))
+_logger = logging.getLogger(__name__)
 
+# Key of the advisory lock of the inalterability chains
+HASH_CHAIN_LOCK = 0x5160C4A1
 
-registerFontFamily(
-    "DejaVuSans",
-    normal="DejaVuSans",
-    bold="DejaVuSans-Bold",
-    italic="DejaVuSans-Oblique",
-    boldItalic="DejaVuSans-BoldOblique",
-)
 
 class SignOcaRequest(models.Model):
     _name = "sign.oca.request"
@@ -48,7 +33,7 @@ class SignOcaRequest(models.Model):
     name = fields.Char(required=True)
     active = fields.Boolean(default=True)
     template_id = fields.Many2one("sign.oca.template")
-    data = fields.Binary(required=True)
+    data = fields.Binary(required=True, attachment=True)
     filename = fields.Char()
     user_id = fields.Many2one(
         comodel_name="res.users",
@@ -93,14 +78,29 @@ class SignOcaRequest(models.Model):
         copy=False,
         tracking=True,
     )
-    signed_count = fields.Integer(compute="_compute_signed_count")
-    signer_count = fields.Integer(compute="_compute_signer_count")
-    to_sign = fields.Boolean(compute="_compute_to_sign")
+    signed_count = fields.Integer(compute="_compute_signed_count", store=True)
+    signer_count = fields.Integer(compute="_compute_signer_count", store=True)
+    to_sign = fields.Boolean(compute="_compute_to_sign", search="_search_to_sign")
+    item_ids = fields.One2many(
+        "sign.oca.request.item",
+        inverse_name="request_id",
+        copy=False,
+        string="Items",
+    )
     signatory_data = fields.Serialized(
-        default=lambda r: {},
+        compute="_compute_signatory_data",
+        inverse="_inverse_signatory_data",
+        compute_sudo=True,
         copy=False,
+        help="Items of the request indexed by their key, as used by the "
+        "configuration and signature widgets.",
     )
     current_hash = fields.Char(copy=False)
+    page_geometry = fields.Serialized(
+        copy=False,
+        help="Size of the pages of the document, inherited from the template "
+        "or read from the document the first time it is needed.",
+    )
     company_id = fields.Many2one(
         "res.company",
         default=lambda r: r.env.company.id,
@@ -143,53 +143,132 @@ class SignOcaRequest(models.Model):
         """Create attachment for signed PDF and link to related record"""
         self.ensure_one()
         
-        if not self.auto_attach_signed or not self.data or not self.record_ref:
+        if not self.auto_attach_signed or not self.record_ref:
+            return False
+        data_attachment = self._get_data_attachment()
+        if not data_attachment:
             return False
             
         # Generate filename
         filename = self.filename or (self.name + '.pdf')
-        
-        # Create attachment
-        attachment = self.env['ir.attachment'].create({
-            'name': filename,
-            'datas': self.data,  # Already base64
-            'res_model': self.record_ref._name,
-            'res_id': self.record_ref.id,
-            'mimetype': 'application/pdf',
-            'description': f'Signed document: {self.name}',
-        })
-        
+
+        # The attachment points to the stored signed document, no copy
+        attachment = data_attachment._sign_oca_share(
+            {
+                "name": filename,
+                "res_model": self.record_ref._name,
+                "res_id": self.record_ref.id,
+                "res_field": False,
+                "mimetype": "application/pdf",
+                "description": f"Signed document: {self.name}",
+            }
+        )
+        if not self._check_signed_attachment(attachment):
+            raise UserError(
+                self.env._(
+                    "The signed document of %s could not be attached.", self.name
+                )
+            )
+
         # Link back to request
         self.signed_attachment_id = attachment.id
-        
-        _logger.info(f"✅ Created attachment {attachment.id} for {self.name}")
+
+        _logger.info("Created attachment %s for %s", attachment.id, self.name)
         return attachment
 
+    def _check_signed_attachment(self, attachment=None, full=False):
+        """Check that ``attachment`` (the signed attachment by default) and
+        the document of the request resolve to the same bytes.
+
+        Both records share the stored file, so comparing its location and
+        checksum is enough; ``full`` reads and hashes the bytes again.
+        """
+        self.ensure_one()
+        attachment = (attachment or self.signed_attachment_id).sudo()
+        source = self._get_data_attachment()
+        if not attachment or not source:
+            return False
+        if (
+            attachment.store_fname != source.store_fname
+            or attachment.checksum != source.checksum
+            or attachment.file_size != source.file_size
+        ):
+            return False
+        if full:
+            checksum = hashlib.sha1(attachment.raw or b"").hexdigest()
+            return checksum == source.checksum
+        return True
+
     def _get_signing_order_by_fields(self):
         """Trả về recordset signer đã sắp xếp theo thứ tự field trên PDF"""
         self.ensure_one()
-        
-        if not self.signatory_data:
-            return self.signer_ids
-        
-        role_field_map = {}
-        for key, item in self.signatory_data.items():
-            role_id = item.get('role_id')
-            tabindex = item.get('tabindex', 999999)
-            
-            if role_id and (role_id not in role_field_map or tabindex < role_field_map[role_id]['tabindex']):
-                role_field_map[role_id] = {
-                    'tabindex': tabindex,
-                    'page': item.get('page', 1),
-                    'position_y': item.get('position_y', 0)
-                }
-        
-        if not role_field_map:
+
+        role_tabindex = {
+            role.id: tabindex
+            for role, tabindex in self.env["sign.oca.request.item"]
+            .sudo()
+            ._read_group(
+                [("request_id", "=", self.id), ("role_id", "!=", False)],
+                ["role_id"],
+                ["tabindex:min"],
+            )
+        }
+        if not role_tabindex:
             return self.signer_ids
-        
+
         # 🔥 Dùng .sorted() thay vì sorted()
         return self.signer_ids.sorted(
-            key=lambda s: role_field_map.get(s.role_id.id, {}).get('tabindex', 999999)
+            key=lambda s: role_tabindex.get(s.role_id.id, 999999)
+        )
+
+    @api.depends("item_ids.item_data")
+    def _compute_signatory_data(self):
+        for record in self:
+            record.signatory_data = {
+                str(item.item_key): item.item_data for item in record.item_ids
+            }
+
+    def _inverse_signatory_data(self):
+        for record in self:
+            record._set_signatory_items(record.signatory_data or {})
+
+    def _set_signatory_items(self, signatory_data):
+        """Synchronize the item rows with ``signatory_data``.
+
+        Only the rows whose content changed are written.
+        """
+        self.ensure_one()
+        item_model = self.env["sign.oca.request.item"].sudo()
+        items = {item.item_key: item for item in self.sudo().item_ids}
+        to_create = []
+        for key, data in signatory_data.items():
+            item = items.pop(int(key), None)
+            if not item:
+                to_create.append(
+                    {"request_id": self.id, "item_key": int(key), "item_data": data}
+                )
+            elif item.item_data != data:
+                item.item_data = data
+        item_model.browse([item.id for item in items.values()]).unlink()
+        item_model.create(to_create)
+
+    def _get_role_items(self, role):
+        self.ensure_one()
+        return (
+            self.env["sign.oca.request.item"]
+            .sudo()
+            .search([("request_id", "=", self.id), ("role_id", "=", role.id)])
+        )
+
+    def _get_item(self, item_id):
+        self.ensure_one()
+        return (
+            self.env["sign.oca.request.item"]
+            .sudo()
+            .search(
+                [("request_id", "=", self.id), ("item_key", "=", int(item_id))],
+                limit=1,
+            )
         )
 
 
@@ -218,20 +297,39 @@ class SignOcaRequest(models.Model):
                 record.signer_id.is_allow_signature if record.signer_id else False
             )
 
+    def _search_to_sign(self, operator, value):
+        if operator not in ("=", "!=") or not isinstance(value, bool):
+            raise UserError(self.env._("Operation not supported"))
+        domain = [
+            (
+                "signer_ids",
+                "any",
+                [
+                    ("is_current_turn", "=", True),
+                    (
+                        "partner_id",
+                        "child_of",
+                        [self.env.user.partner_id.commercial_partner_id.id],
+                    ),
+                ],
+            )
+        ]
+        if (operator == "=") != value:
+            domain = ["!"] + domain
+        return domain
+
     def sign(self):
         self.ensure_one()
         if not self.signer_id:
             return self.get_formview_action()
         return self.signer_id.sign()
 
-    @api.depends("signatory_data")
+    @api.depends("item_ids.item_key")
     def _compute_next_item_id(self):
         for record in self:
             record.next_item_id = (
-                record.signatory_data
-                and max([int(key) for key in record.signatory_data.keys()])
-                or 0
-            ) + 1
+                max(record.sudo().item_ids.mapped("item_key"), default=0) + 1
+            )
 
     def preview(self):
         self.ensure_one()
@@ -251,6 +349,7 @@ class SignOcaRequest(models.Model):
         return {
             "name": self.name,
             "items": self.signatory_data,
+            "pages": self._get_page_info(),
             "roles": [
                 {"id": signer.role_id.id, "name": signer.role_id.name}
                 for signer in self.signer_ids
@@ -261,6 +360,30 @@ class SignOcaRequest(models.Model):
             ],
         }
 
+    def _get_page_geometry(self):
+        """Return ``{page_number: {"width", "height", "rotation"}}``.
+
+        Appending overlays never changes the pages, so the geometry stays
+        valid until another document is uploaded.
+        """
+        self.ensure_one()
+        if not self.page_geometry:
+            with self._get_document() as (_pdf_data, reader):
+                geometry = pdf_render.get_page_geometry(reader)
+            self.sudo().write({"page_geometry": geometry})
+        return self.page_geometry
+
+    def _get_page_boxes(self):
+        return pdf_render.get_page_boxes(self._get_page_geometry())
+
+    def _get_page_info(self):
+        return [
+            dict(page, page=int(page_number))
+            for page_number, page in sorted(
+                self._get_page_geometry().items(), key=lambda page: int(page[0])
+            )
+        ]
+
     def _ensure_draft(self):
         self.ensure_one()
         if not self.signer_ids:
@@ -289,24 +412,24 @@ class SignOcaRequest(models.Model):
 
     def delete_item(self, item_id):
         self._ensure_draft()
-        data = self.signatory_data
-        data.pop(str(item_id))
-        self.signatory_data = data
+        self.check_access("write")
+        self._get_item(item_id).unlink()
         self._set_action_log("delete_field")
 
     def set_item_data(self, item_id, vals):
         self._ensure_draft()
-        data = self.signatory_data
-        data[str(item_id)].update(vals)
-        self.signatory_data = data
+        self.check_access("write")
+        item = self._get_item(item_id)
+        data = item.item_data
+        data.update(vals)
+        item.item_data = data
         self._set_action_log("edit_field")
 
     def add_item(self, item_vals):
         self._ensure_draft()
         item_id = self.next_item_id
         field_id = self.env["sign.oca.field"].browse(item_vals["field_id"])
-        signatory_data = self.signatory_data
-        signatory_data[item_id] = {
+        item = {
             "id": item_id,
             "field_id": field_id.id,
             "field_type": field_id.field_type,
@@ -322,40 +445,121 @@ class SignOcaRequest(models.Model):
             "default_value": field_id.default_value,
             "placeholder": "",
         }
-        signatory_data[item_id].update(item_vals)
-        self.signatory_data = signatory_data
+        item.update(item_vals)
+        self.check_access("write")
+        self.env["sign.oca.request.item"].sudo().create(
+            {"request_id": self.id, "item_key": item_id, "item_data": item}
+        )
         self._set_action_log("add_field")
-        return signatory_data[item_id]
+        return item
 
     def _render_auto_fill_fields(self):
         """Render tất cả auto_fill vào PDF ngay khi gửi request"""
         self.ensure_one()
 
-        input_data = BytesIO(b64decode(self.data))
-        reader = PdfFileReader(input_data)
-        output = PdfFileWriter()
-        pages = {i+1: reader.getPage(i) for i in range(reader.numPages)}
-
-        for key, item in self.signatory_data.items():
-            if item.get("field_type") == "auto_fill":
-                new_page = self.signer_ids[0]._get_pdf_page_auto_fill(item, pages[item["page"]].mediaBox)
-                if new_page:
-                    pages[item["page"]].mergePage(new_page)
-                    # đánh dấu đã merge để frontend ko render overlay nữa
-                    self.signatory_data[key]["alreadyMerged"] = True
+        auto_fill_items = {
+            item: item.item_data
+            for item in self.env["sign.oca.request.item"].sudo().search(
+                [("request_id", "=", self.id), ("field_type", "=", "auto_fill")]
+            )
+        }
+        with self._get_document() as (pdf_data, reader):
+            pdf_data, rendered = self.env["sign.oca.request.signer"]._render_pdf_data(
+                pdf_data,
+                list(auto_fill_items.values()),
+                style=self._get_paragraph_style(),
+                boxes=self._get_page_boxes(),
+                reader=reader,
+            )
+        self._write_auto_fill_render(auto_fill_items, pdf_data, rendered)
 
-        for i in range(1, len(pages)+1):
-            output.addPage(pages[i])
+    def _write_auto_fill_render(self, auto_fill_items, pdf_data, rendered):
+        """Save the document once the ``rendered`` items of
+        ``auto_fill_items`` (``{item: item_data}``) are drawn in it."""
+        self.ensure_one()
+        if not rendered:
+            return
+        self.write(
+            {
+                "data": b64encode(pdf_data),
+                "page_geometry": self.page_geometry,
+                "current_hash": hashlib.sha1(pdf_data).hexdigest(),
+            }
+        )
+        for item, item_data in auto_fill_items.items():
+            if any(item_data is rendered_item for rendered_item in rendered):
+                # đánh dấu đã merge để frontend ko render overlay nữa
+                item.item_data = dict(item_data, alreadyMerged=True)
 
-        stream = BytesIO()
-        output.write(stream)
-        stream.seek(0)
+    def _render_auto_fill_fields_batch(self):
+        """Render the auto fill fields of many requests.
 
-        self.write({
-            "data": b64encode(stream.read()),
-            "signatory_data": self.signatory_data,
-        })
+        Requests generated from a template share its document, which is
+        decoded and parsed once for all of them. Only the overlays of each
+        request are drawn, and they are appended to the shared bytes.
+        """
+        attachments = (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_id", "in", self.ids),
+                    ("res_field", "=", "data"),
+                ]
+            )
+        )
+        checksums = {attachment.res_id: attachment.checksum for attachment in attachments}
+        items_by_request = {}
+        for item in (
+            self.env["sign.oca.request.item"]
+            .sudo()
+            .search([("request_id", "in", self.ids), ("field_type", "=", "auto_fill")])
+        ):
+            items_by_request.setdefault(item.request_id, {})[item] = item.item_data
+        groups = {}
+        for record in self:
+            if record not in items_by_request:
+                continue
+            key = (checksums.get(record.id) or record.id, record.template_id)
+            groups.setdefault(key, self.browse())
+            groups[key] |= record
 
+        for (_checksum, template), records in groups.items():
+            if len(records) == 1:
+                records._render_auto_fill_fields()
+                continue
+            with records[0]._get_document() as (pdf_data, reader):
+                boxes = records[0]._get_page_boxes()
+                style = records[0]._get_paragraph_style()
+                for index, record in enumerate(records):
+                    auto_fill_items = items_by_request[record]
+                    overlays = {}
+                    rendered = []
+                    for page_number, page_items in pdf_render.group_items_by_page(
+                        auto_fill_items.values()
+                    ).items():
+                        overlay, drawn_items = pdf_render.render_overlay(
+                            page_items, boxes[page_number], style
+                        )
+                        if overlay:
+                            overlays[page_number - 1] = [overlay]
+                        rendered += drawn_items
+                    if not overlays:
+                        continue
+                    try:
+                        record_data = pdf_incremental.append_overlays(
+                            pdf_data, overlays, reader=reader
+                        )
+                    except pdf_incremental.IncrementalUpdateError as e:
+                        # The document is rewritten, which needs its own pages
+                        _logger.debug("Rendering the requests one by one: %s", e)
+                        for remaining in records[index:]:
+                            remaining._render_auto_fill_fields()
+                        break
+                    record._write_auto_fill_render(
+                        auto_fill_items, record_data, rendered
+                    )
 
     def cancel(self):
         self.write({"state": "cancel"})
@@ -366,10 +570,10 @@ class SignOcaRequest(models.Model):
         for record in self:
             record.signer_count = len(record.signer_ids)
 
-    @api.depends("signer_ids", "signer_ids.signed_on")
+    @api.depends("signer_ids", "signer_ids.signed")
     def _compute_signed_count(self):
         for record in self:
-            record.signed_count = len(record.signer_ids.filtered(lambda r: r.signed_on))
+            record.signed_count = len(record.signer_ids.filtered("signed"))
 
     def open_template(self):
         return self.template_id.configure()
@@ -379,49 +583,61 @@ class SignOcaRequest(models.Model):
         if self.state != "draft":
             return
 
-        self._render_auto_fill_fields()
+        if self._is_async_rendering():
+            self.env["sign.oca.render.job"].sudo().create(
+                {"request_id": self.id, "job_type": "send"}
+            )
+        else:
+            self._render_auto_fill_fields()
+        self._send_to_signers(message)
+
+    def action_send_multi(self, message=""):
+        """Send the draft requests of ``self``, rendering them together."""
+        requests = self.filtered(lambda r: r.state == "draft")
+        async_requests = requests.filtered(lambda r: r._is_async_rendering())
+        self.env["sign.oca.render.job"].sudo().create(
+            [{"request_id": record.id, "job_type": "send"} for record in async_requests]
+        )
+        (requests - async_requests)._render_auto_fill_fields_batch()
+        requests._send_to_signers(message)
+
+    def _send_to_signers(self, message=""):
+        """Send the requests and notify their first signers all at once."""
+        first_signers = self.env["sign.oca.request.signer"]
+        for record in self:
+            record._set_action_log("validate")
+            record.state = "sent"
+            record._assign_signing_sequence()
+            first_signers |= record._get_signer_by_sequence(0)
+        first_signers._notify(message)
+
+    def _get_paragraph_style(self):
+        self.ensure_one()
+        return pdf_render.get_paragraph_style(
+            self.template_id.font_family, self.template_id.font_size
+        )
+
+    def _is_async_rendering(self):
+        self.ensure_one()
+        return self.company_id.sign_oca_async_rendering and not self.env.context.get(
+            "sign_oca_render_sync"
+        )
 
-        self._set_action_log("validate")
-        self.state = "sent"
-        ordered_signers = self._get_signing_order_by_fields()
-        if ordered_signers:
-            first_signer = ordered_signers[0]
-            self._notify_signer(first_signer, message)
+    def _assign_signing_sequence(self):
+        """Freeze the signing order computed from the fields on the signers."""
+        for record in self:
+            for sequence, signer in enumerate(record._get_signing_order_by_fields()):
+                if signer.signing_sequence != sequence:
+                    signer.signing_sequence = sequence
+
+    def _get_signer_by_sequence(self, sequence):
+        self.ensure_one()
+        return self.signer_ids.filtered(lambda s: s.signing_sequence == sequence)[:1]
 
 
     def _notify_signer(self, signer, message=""):
         """Send notification to a specific signer with file attachment"""
-        signer._portal_ensure_token()
-        
-        # Chuẩn bị file đính kèm cho email
-        attachment_ids = []
-        if self.primary_attachment and self.primary_attachment_filename:
-            # Tạo attachment tạm cho email
-            attachment = self.env['ir.attachment'].create({
-                'name': self.primary_attachment_filename,
-                'datas': self.primary_attachment,
-                'res_model': 'mail.compose.message',
-                'res_id': 0,
-                'mimetype': 'application/pdf',
-                'description': f'Tài liệu ủy quyền - {self.name}',
-            })
-            attachment_ids.append(attachment.id)
-        
-        render_result = self.env["ir.qweb"]._render(
-            "sign_oca.sign_oca_template_mail",
-            {"record": signer, "body": message, "link": signer.access_url},
-            engine="ir.qweb",
-            minimal_qcontext=True,
-        )
-        self.env["mail.thread"].message_notify(
-            body=render_result,
-            partner_ids=signer.partner_id.ids,
-            subject=self.env._("New document to sign"),
-            subtype_id=self.env.ref("mail.mt_comment").id,
-            mail_auto_delete=False,
-            email_layout_xmlid="mail.mail_notification_light",
-            attachment_ids=attachment_ids,  # File đính kèm
-        )
+        signer._notify(message)
 
     def action_send_signed_request(self):
         self.ensure_one()
@@ -430,41 +646,39 @@ class SignOcaRequest(models.Model):
             or not self.env.company.sign_oca_send_sign_request_copy
         ):
             return
-        for signer in self.signer_ids:
-            attachments = (
-                self.env["ir.attachment"]
-                .sudo()
-                .search(
-                    [
-                        ("res_model", "=", "sign.oca.request"),
-                        ("res_id", "=", self.id),
-                        ("res_field", "=", "data"),
-                    ]
-                )
-            )
-            # The message will not be linked to the record because we do not want
-            # it happen.
-            self.env["mail.thread"].message_notify(
-                body=self.env._(
-                    "%(name)s (%(email)s) has sent the signed document.",
-                    name=self.create_uid.name,
-                    email=self.create_uid.email,
-                ),
-                partner_ids=signer.partner_id.ids,
-                subject=self.env._("Signed document"),
-                subtype_id=self.env.ref("mail.mt_comment").id,
-                mail_auto_delete=False,
-                attachment_ids=attachments.ids,
+        attachments = (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", "sign.oca.request"),
+                    ("res_id", "=", self.id),
+                    ("res_field", "=", "data"),
+                ]
             )
+        )
+        # The message will not be linked to the record because we do not want
+        # it happen. Each signer still receives their own email.
+        self.env["mail.thread"].message_notify(
+            body=self.env._(
+                "%(name)s (%(email)s) has sent the signed document.",
+                name=self.create_uid.name,
+                email=self.create_uid.email,
+            ),
+            partner_ids=self.signer_ids.partner_id.ids,
+            subject=self.env._("Signed document"),
+            subtype_id=self.env.ref("mail.mt_comment").id,
+            mail_auto_delete=False,
+            attachment_ids=attachments.ids,
+        )
 
     def _check_signed(self):
         self.ensure_one()
         if self.state not in ["sent", "partially_signed"]:
             return
         
-        ordered_signers = self._get_signing_order_by_fields()
-        signed_count = len(ordered_signers.filtered(lambda r: r.signed_on))
-        total_signers = len(ordered_signers)
+        signed_count = len(self.signer_ids.filtered(lambda r: r.signed_on))
+        total_signers = len(self.signer_ids)
 
         if signed_count == total_signers:
             self.state = "signed"
@@ -473,9 +687,8 @@ class SignOcaRequest(models.Model):
             self.state = "partially_signed"
             if signed_count > self.current_signer_index:
                 self.current_signer_index = signed_count
-                if signed_count < total_signers:
-                    next_signer = ordered_signers[signed_count]
-                    self._notify_signer(next_signer, "The previous signer has completed...")
+                next_signer = self._get_signer_by_sequence(signed_count)
+                next_signer._notify("The previous signer has completed...")
 
         # Force re-compute instead of invalidating cache
         self.signer_ids._compute_is_allow_signature()
@@ -495,29 +708,263 @@ class SignOcaRequest(models.Model):
         return request.httprequest.access_route[-1]
 
     def _set_action_log(self, action, **kwargs):
+        """Buffer the log of ``action``, written when the transaction commits.
+
+        The author and the date are taken now, as the logs are inserted
+        together by :meth:`~.SignRequestLog._flush_buffer`.
+        """
+        self.ensure_one()
+        vals = self._set_action_log_vals(action, **kwargs)
+        vals.setdefault("uid", self.env.uid)
+        vals.setdefault("partner_id", self.env.user.partner_id.id)
+        vals.setdefault("date", fields.Datetime.now())
+        self.env["sign.oca.request.log"]._add_to_buffer(vals)
+
+    def _get_data_attachment(self):
+        self.ensure_one()
+        return (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_id", "=", self.id),
+                    ("res_field", "=", "data"),
+                ],
+                limit=1,
+            )
+        )
+
+    def _get_document(self):
+        """Context manager yielding ``(pdf_data, reader)`` of the current
+        version of the document, parsed once per worker. The reader must
+        not be modified."""
+        self.ensure_one()
+        return pdf_cache.reader_cache.document(
+            self._get_content_hash(), lambda: b64decode(self.data)
+        )
+
+    def _get_content_hash(self):
+        """Hash of the current version of the document."""
+        self.ensure_one()
+        return self.current_hash or self._get_data_attachment().checksum
+
+    def _get_page_manifest(self, role=None):
+        """Describe the pages of the document for viewers loading them one
+        by one. ``to_sign`` marks the pages with fields of ``role``."""
+        self.ensure_one()
+        items = self.env["sign.oca.request.item"].sudo().search(
+            [("request_id", "=", self.id)]
+        )
+        field_pages = set(items.mapped("page"))
+        role_pages = set(
+            items.filtered(lambda item: role and item.role_id == role).mapped("page")
+        )
+        pages = [
+            dict(
+                page,
+                has_fields=page["page"] in field_pages,
+                to_sign=page["page"] in role_pages,
+            )
+            for page in self._get_page_info()
+        ]
+        return {
+            "content_hash": self._get_content_hash(),
+            "page_count": len(pages),
+            "pages": pages,
+        }
+
+    def get_page_manifest(self):
+        self.ensure_one()
+        manifest = self._get_page_manifest()
+        manifest["url"] = f"/sign_oca/request/{self.id}/page/%s"
+        return manifest
+
+    def _get_data_stream(self):
+        """Return the ``http.Stream`` of the document.
+
+        The document is read from the filestore and its ETag is the hash of
+        its current version, so clients can revalidate it and fetch ranges.
+        """
+        self.ensure_one()
+        stream = self.env["ir.binary"]._get_stream_from(
+            self, "data", mimetype="application/pdf"
+        )
+        stream.etag = self.current_hash or stream.etag
+        return stream
+
+    def _get_primary_attachment(self):
         self.ensure_one()
         return (
-            self.env["sign.oca.request.log"]
+            self.env["ir.attachment"]
             .sudo()
-            .create(self._set_action_log_vals(action, **kwargs))
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_id", "=", self.id),
+                    ("res_field", "=", "primary_attachment"),
+                ],
+                limit=1,
+            )
         )
 
+    def _get_notification_attachment(self):
+        """Return the attachment sending the primary attachment by email.
+
+        It points to the stored file of the primary attachment and is shared
+        by all the notifications of the requests using the same file.
+        """
+        self.ensure_one()
+        source = self._get_primary_attachment()
+        if not source:
+            return source
+        attachment = source.search(
+            [
+                ("res_model", "=", "mail.compose.message"),
+                ("res_id", "=", 0),
+                ("checksum", "=", source.checksum),
+                ("name", "=", self.primary_attachment_filename),
+            ],
+            limit=1,
+        )
+        if not attachment:
+            attachment = source._sign_oca_share(
+                {
+                    "name": self.primary_attachment_filename,
+                    "res_model": "mail.compose.message",
+                    "res_id": 0,
+                    "mimetype": "application/pdf",
+                    "description": self.env._("Authorization document"),
+                }
+            )
+        return attachment
+
+    def _share_template_data(self):
+        """Use the template document as data without copying it.
+
+        The request points to the stored file of the template until the first
+        render writes a new version of the document.
+        """
+        for record in self:
+            template_attachment = record.template_id._get_data_attachment()
+            if not template_attachment:
+                record.data = record.template_id.data
+            else:
+                template_attachment._sign_oca_share(
+                    {
+                        "name": "data",
+                        "res_model": record._name,
+                        "res_id": record.id,
+                        "res_field": "data",
+                    }
+                )
+            record.page_geometry = record.template_id._get_page_geometry()
+        self.invalidate_recordset(["data"])
+
+    @api.model
+    def _get_data_storage_report(self, template_ids=None):
+        """Return the storage used by the documents of the requests.
+
+        ``logical_size`` is what the documents would take if each request had
+        its own copy, ``stored_size`` what they really add to the filestore
+        once files shared with their template or with other requests are
+        counted once.
+        """
+        template_clause = "AND req.template_id IN %s" if template_ids else ""
+        self.env["ir.attachment"].flush_model()
+        self.env.cr.execute(
+            f"""
+            WITH request_files AS (
+                SELECT att.id,
+                       att.store_fname,
+                       att.file_size,
+                       EXISTS (
+                           SELECT 1
+                             FROM ir_attachment tmpl
+                            WHERE tmpl.res_model = 'sign.oca.template'
+                              AND tmpl.res_field = 'data'
+                              AND tmpl.res_id = req.template_id
+                              AND tmpl.store_fname = att.store_fname
+                       ) AS shared
+                  FROM ir_attachment att
+                  JOIN sign_oca_request req ON req.id = att.res_id
+                 WHERE att.res_model = 'sign.oca.request'
+                   AND att.res_field = 'data'
+                   {template_clause}
+            )
+            SELECT COUNT(*),
+                   COUNT(*) FILTER (WHERE shared),
+                   COALESCE(SUM(file_size), 0),
+                   (SELECT COALESCE(SUM(file_size), 0)
+                      FROM (
+                        SELECT DISTINCT ON (COALESCE(store_fname, id::varchar))
+                               file_size
+                          FROM request_files
+                         WHERE NOT shared
+                      ) AS unique_files)
+              FROM request_files
+            """,
+            (tuple(template_ids),) if template_ids else (),
+        )
+        request_count, shared_count, logical_size, stored_size = self.env.cr.fetchone()
+        return {
+            "request_count": request_count,
+            "shared_count": shared_count,
+            "logical_size": logical_size,
+            "stored_size": stored_size,
+            "saved_size": logical_size - stored_size,
+        }
+
     @api.model_create_multi
     def create(self, vals_list):
-        # Copy files từ template khi tạo request
+        # Files của template được dùng chung, không copy
+        share_data = []
+        share_primary = []
         for vals in vals_list:
-            if vals.get('template_id'):
-                template = self.env['sign.oca.template'].browse(vals['template_id'])
-                # Copy attachment fields từ template
-                if template.primary_attachment:
-                    vals['primary_attachment'] = template.primary_attachment
-                    vals['primary_attachment_filename'] = template.primary_attachment_filename
-        
+            share_data.append(bool(vals.get("template_id") and not vals.get("data")))
+            primary_attachment = self.env["ir.attachment"]
+            if vals.get("template_id") and not vals.get("primary_attachment"):
+                template = self.env["sign.oca.template"].browse(vals["template_id"])
+                primary_attachment = template._get_primary_attachment()
+                if primary_attachment:
+                    vals["primary_attachment_filename"] = (
+                        template.primary_attachment_filename
+                    )
+            share_primary.append(primary_attachment)
+
         records = super().create(vals_list)
+        records.browse(
+            [record.id for record, share in zip(records, share_data) if share]
+        )._share_template_data()
+        for record, primary_attachment in zip(records, share_primary):
+            if primary_attachment:
+                primary_attachment._sign_oca_share(
+                    {
+                        "name": "primary_attachment",
+                        "res_model": record._name,
+                        "res_id": record.id,
+                        "res_field": "primary_attachment",
+                    }
+                )
+        records.invalidate_recordset(["primary_attachment"])
         for record in records:
             record._set_action_log("create")
         return records
 
+    def write(self, vals):
+        if "data" in vals and "page_geometry" not in vals:
+            # A new document, its pages are read again when needed
+            vals = dict(vals, page_geometry=False)
+        if "data" in vals and "current_hash" not in vals:
+            vals = dict(vals, current_hash=False)
+        if "data" in vals:
+            # The previous version is not needed anymore
+            for record in self:
+                pdf_cache.reader_cache.invalidate(record._get_content_hash())
+        if "state" in vals or "current_signer_index" in vals:
+            self.env["res.users"]._sign_oca_invalidate_request_count()
+        return super().write(vals)
+
 
 class SignOcaRequestSigner(models.Model):
     _name = "sign.oca.request.signer"
@@ -531,9 +978,28 @@ class SignOcaRequestSigner(models.Model):
     role_id = fields.Many2one("sign.oca.role", required=True, ondelete="restrict")
     signed_on = fields.Datetime()
     signature_hash = fields.Char()
+    signed_data_size = fields.Integer(
+        copy=False,
+        help="Size in bytes of the document once signed by this signer. "
+        "As signatures are appended to the document, the first bytes of the "
+        "current document are the ones that were signed.",
+    )
     model = fields.Char(compute="_compute_model", store=True)
     res_id = fields.Integer(compute="_compute_res_id", store=True)
     is_allow_signature = fields.Boolean(compute="_compute_is_allow_signature")
+    signed = fields.Boolean(compute="_compute_signed", store=True, index=True)
+    is_current_turn = fields.Boolean(
+        compute="_compute_is_current_turn",
+        store=True,
+        help="The request waits for the signature of this signer",
+    )
+    signing_sequence = fields.Integer(
+        readonly=True,
+        copy=False,
+        index=True,
+        help="Position of the signer in the signing order, assigned when the "
+        "request is sent",
+    )
     secure_sequence_number = fields.Integer(
         string="Inalteralbility No Gap Sequence #",
         readonly=True,
@@ -546,6 +1012,12 @@ class SignOcaRequestSigner(models.Model):
     sequence_id = fields.Many2one(
         "ir.sequence", copy=False, default=lambda r: r._get_sequence()
     )
+    hash_state = fields.Selection(
+        [("pending", "Waiting to be chained"), ("chained", "Chained")],
+        readonly=True,
+        copy=False,
+        index=True,
+    )
     altered_hash = fields.Boolean(compute="_compute_altered_hash")
     latitude = fields.Float()
     longitude = fields.Float()
@@ -560,55 +1032,93 @@ class SignOcaRequestSigner(models.Model):
         for item in self.filtered(lambda x: x.request_id.record_ref):
             item.res_id = item.request_id.record_ref.id
 
-    @api.depends("signed_on", "partner_id")
+    def init(self):
+        # Inbox of a partner: only the signers whose turn it is are indexed
+        create_index(
+            self.env.cr,
+            "sign_oca_request_signer_inbox_index",
+            self._table,
+            ["partner_id", "id"],
+            where="is_current_turn",
+        )
+
+    @api.depends("signed_on")
+    def _compute_signed(self):
+        for signer in self:
+            signer.signed = bool(signer.signed_on)
+
+    @api.depends(
+        "signed_on",
+        "signing_sequence",
+        "request_id.state",
+        "request_id.current_signer_index",
+    )
+    def _compute_is_current_turn(self):
+        for signer in self:
+            signer.is_current_turn = (
+                not signer.signed_on
+                and signer.request_id.state in ("sent", "partially_signed")
+                and signer.signing_sequence == signer.request_id.current_signer_index
+            )
+
+    @api.model
+    def _get_inbox_domain(self, partners):
+        return [("partner_id", "child_of", partners.ids), ("is_current_turn", "=", True)]
+
+    @api.model
+    def _search_inbox(self, partners, limit=None, offset=0):
+        """Return the signers of ``partners`` and their contacts whose turn
+        it is, newest first."""
+        return self.search(
+            self._get_inbox_domain(partners),
+            order="id desc",
+            limit=limit,
+            offset=offset,
+        )
+
+    @api.model
+    def get_inbox(self, limit=80, offset=0):
+        """Documents waiting for the signature of the current user."""
+        partners = self.env.user.partner_id.commercial_partner_id
+        signers = self._search_inbox(partners, limit=limit, offset=offset)
+        return {
+            "total": self.search_count(self._get_inbox_domain(partners)),
+            "records": [
+                {
+                    "id": signer.id,
+                    "request_id": signer.request_id.id,
+                    "name": signer.request_id.name,
+                    "role": signer.role_id.name,
+                    "model": signer.model,
+                    "res_id": signer.res_id,
+                    "create_date": signer.request_id.create_date,
+                }
+                for signer in signers
+            ],
+        }
+
+    @api.depends("partner_id", "is_current_turn")
     @api.depends_context("uid")
     def _compute_is_allow_signature(self):
         user = self.env.user
-        _logger.info(f"🔍 _compute_is_allow_signature called for user: {user.login} ({user.id})")
-        
+        # Portal context check
+        is_portal_access = self._context.get("portal_access") or user.login == "public"
         for item in self:
-            _logger.info(f"🔍 Checking signer: {item.partner_id.name} (ID: {item.id})")
-            _logger.info(f"🔍 Already signed: {bool(item.signed_on)}")
-            
-            # Skip if already signed
-            if item.signed_on:
+            # Backend access: Standard user permission check
+            if (
+                not is_portal_access
+                and item.partner_id != user.partner_id.commercial_partner_id
+            ):
                 item.is_allow_signature = False
-                _logger.info(f"❌ Already signed - is_allow_signature = False")
                 continue
-
-            # Portal context check
-            is_portal_access = self._context.get('portal_access') or user.login == 'public'
-            _logger.info(f"🔍 Portal access: {is_portal_access}, Context: {self._context.get('portal_access')}")
-            
-            if not is_portal_access:
-                # Backend access: Standard user permission check
-                if item.partner_id != user.partner_id.commercial_partner_id:
-                    item.is_allow_signature = False
-                    _logger.info(f"❌ Backend: User mismatch - is_allow_signature = False")
-                    continue
-                _logger.info(f"✅ Backend: User match")
-
-            # Sequence validation
-            ordered_signers = item.request_id._get_signing_order_by_fields()
-            signer_index = list(ordered_signers).index(item)
-            current_signer_index = item.request_id.current_signer_index
-            is_current_signer = current_signer_index == signer_index
-            previous_signers_signed = True
-            if signer_index > 0:
-                previous_signers = ordered_signers[:signer_index]
-                signed_status = previous_signers.mapped('signed_on')
-                previous_signers_signed = all(signed_status)
-                _logger.info(f"🔍 Previous signers signed status: {signed_status}")
-            
-            _logger.info(f"🔍 Previous signers all signed: {previous_signers_signed}")
-
-            item.is_allow_signature = is_current_signer and previous_signers_signed
-            _logger.info(f"🔍 FINAL is_allow_signature: {item.is_allow_signature}")
-            
-            # Additional debug info
-            _logger.info(f"🔍 Request state: {item.request_id.state}")
-            _logger.info(f"🔍 All signer IDs: {[s.id for s in item.request_id.signer_ids]}")
-            _logger.info(f"🔍 Signed signer IDs: {[s.id for s in item.request_id.signer_ids if s.signed_on]}")
+            # Not signed, request sent and every previous signer has signed
+            item.is_allow_signature = item.is_current_turn
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(
+                "Signature allowed for user %s: %s",
+                user.id,
+                {item.id: item.is_allow_signature for item in self},
+            )
 
 
     @api.depends("access_token")
@@ -627,8 +1137,6 @@ class SignOcaRequestSigner(models.Model):
 
     def get_info(self, access_token=False):
         self.ensure_one()
-        _logger.info(f"🔍 get_info called for signer {self.id}, access_token: {bool(access_token)}")
-        
         # Force recompute để đảm bảo fresh data
         self._compute_is_allow_signature()
         
@@ -645,11 +1153,12 @@ class SignOcaRequestSigner(models.Model):
                 "phone": self.partner_id.phone,
             },
         }
-        
-        _logger.info(f"🔍 get_info response - to_sign: {info_data['to_sign']}")
-        _logger.info(f"🔍 get_info response - role_id: {info_data['role_id']}")
-        _logger.info(f"🔍 get_info response - items count: {len(info_data['items'])}")
-        
+        _logger.debug(
+            "Signer %s info: to_sign %s, role %s",
+            self.id,
+            info_data["to_sign"],
+            info_data["role_id"],
+        )
         self._set_action_log("view", access_token=access_token)
         return info_data
 
@@ -666,6 +1175,48 @@ class SignOcaRequestSigner(models.Model):
         }
 
     def action_sign(self, items, access_token=False, latitude=False, longitude=False):
+        self.ensure_one()
+        with instrumentation.collect(self.env.cr) as collector:
+            result = self._action_sign(
+                items,
+                access_token=access_token,
+                latitude=latitude,
+                longitude=longitude,
+            )
+        self.env["sign.oca.metric"]._record(self.request_id, collector)
+        return result
+
+    def _action_sign(self, items, access_token=False, latitude=False, longitude=False):
+        self._check_can_sign()
+        self.signed_on = fields.Datetime.now()  # Quan trọng: set trước khi render PDF
+        self.request_id.signatory_data = self._prepare_signatory_data(items)
+        self.latitude = latitude
+        self.longitude = longitude
+
+        if self.request_id._is_async_rendering():
+            self._set_action_log("sign", access_token=access_token)
+            self.env["sign.oca.render.job"].sudo().create(
+                {
+                    "request_id": self.request_id.id,
+                    "signer_id": self.id,
+                    "job_type": "sign",
+                    "access_token": access_token,
+                }
+            )
+            return {
+                "type": "ir.actions.act_url",
+                "url": self.access_url,
+                "pending": True,
+            }
+
+        self._render_signature()
+        self._finalize_signature(access_token=access_token, log=True)
+        return {
+            "type": "ir.actions.act_url",
+            "url": self.access_url,
+        }
+
+    def _check_can_sign(self):
         self.ensure_one()
         if self.signed_on:
             raise ValidationError(
@@ -676,124 +1227,305 @@ class SignOcaRequestSigner(models.Model):
             raise ValidationError(self.env._("Request cannot be signed"))
         
         # Verify this signer is the current one in sequence
-        ordered_signers = self.request_id._get_signing_order_by_fields()
-        current_signer_index = self.request_id.current_signer_index
-        signer_index = list(ordered_signers).index(self)
-        if signer_index != current_signer_index:
+        if self.signing_sequence != self.request_id.current_signer_index:
             raise ValidationError(
                 self.env._("It's not your turn to sign yet. Please wait for the previous signers to complete.")
             )
 
-        self.signed_on = fields.Datetime.now()  # Quan trọng: set trước khi render PDF
-        signatory_data = self.request_id.signatory_data.copy()
-
-        input_data = BytesIO(b64decode(self.request_id.data))
-        reader = PdfFileReader(input_data)
-        output = PdfFileWriter()
-        pages = {}
-        for page_number in range(1, reader.numPages + 1):
-            pages[page_number] = reader.getPage(page_number - 1)
-
-
-        for key, item_data in signatory_data.items():
-            if key in items:
-                signatory_data[key].update(items[key])
-                if signatory_data[key].get("role_id") == self.role_id.id:
-                    self._check_signable(signatory_data[key])
-
-            item = signatory_data[key]
+    def _prepare_signatory_data(self, items):
+        """Return the signatory data of the request with ``items`` applied."""
+        self.ensure_one()
+        signatory_data = self.request_id.signatory_data
+        for key, vals in items.items():
+            if key not in signatory_data:
+                continue
+            vals = dict(vals)
+            # Only the server knows what is already part of the document
+            vals.pop("alreadyMerged", None)
+            signatory_data[key].update(vals)
+            if signatory_data[key].get("role_id") == self.role_id.id:
+                self._check_signable(signatory_data[key])
+        return signatory_data
+
+    @api.model
+    def _get_items_to_render(self, signatory_data):
+        to_render = []
+        for item in signatory_data.values():
             is_auto = item.get("field_type") == "auto_fill"
-            already = item.get("alreadyMerged")
             has_value = bool(item.get("value"))
+            # Fields of previous signers are already part of the document
+            if not item.get("alreadyMerged") and (is_auto or has_value):
+                to_render.append(item)
+        return to_render
 
-            if (is_auto and not already) or (not is_auto and has_value):
-                page = pages[item["page"]]
-                new_page = self._get_pdf_page(item, page.mediaBox)
-                if new_page:
-                    page.mergePage(new_page)
-                    pages[item["page"]] = page
-                    signatory_data[key]["alreadyMerged"] = True
-                    _logger.info(f"Auto-fill merge flags: {[ (k,v.get('alreadyMerged')) for k,v in signatory_data.items() if v.get('field_type')=='auto_fill' ]}")
-
-                
-        for page_number in pages:
-            output.addPage(pages[page_number])
-        output_stream = BytesIO()
-        output.write(output_stream)
-        output_stream.seek(0)
-        signed_pdf = output_stream.read()
+    def _render_signature(self):
+        """Merge the values not yet part of the document into it."""
+        self.ensure_one()
+        signatory_data = self.request_id.signatory_data
+        with self.request_id._get_document() as (pdf_data, reader):
+            signed_pdf, rendered = self._render_pdf_data(
+                pdf_data,
+                self._get_items_to_render(signatory_data),
+                boxes=self.request_id._get_page_boxes(),
+                reader=reader,
+            )
+        with instrumentation.span("write", signer=self.id):
+            self._write_signed_data(signatory_data, signed_pdf, rendered)
+
+    def _write_signed_data(self, signatory_data, signed_pdf, rendered):
+        self.ensure_one()
+        for item in rendered:
+            item["alreadyMerged"] = True
         final_hash = hashlib.sha1(signed_pdf).hexdigest()
-        
+
         self.request_id.write(
             {
                 "signatory_data": signatory_data,
                 "data": b64encode(signed_pdf),
+                "page_geometry": self.request_id.page_geometry,
                 "current_hash": final_hash,
             }
         )
         self.signature_hash = final_hash
-        self.latitude = latitude
-        self.longitude = longitude
-        
+        self.signed_data_size = len(signed_pdf)
+
+    def _finalize_signature(self, access_token=False, log=False):
+        """Move the request forward once the signature is in the document."""
+        self.ensure_one()
         # Check if all signers have signed and update state
         self.request_id._check_signed()
-        
-        self._set_action_log("sign", access_token=access_token)
+
+        if log:
+            self._set_action_log("sign", access_token=access_token)
         if self.sequence_id:
-            self.flush_recordset()
-            new_number = self.sequence_id.next_by_id()
-            self.write(
-                {
-                    "secure_sequence_number": new_number,
-                    "inalterable_hash": self._get_new_hash(new_number),
-                }
-            )
-        
+            if self.request_id.company_id.sign_oca_async_hash_chain:
+                self.hash_state = "pending"
+                self.env.ref("sign_oca.ir_cron_sign_oca_hash_chain")._trigger()
+            else:
+                self._chain_hashes()
+
         # Only send final notification when all have signed
         if self.request_id.state == "signed":
             self.request_id.action_send_signed_request()
-        
-        return {
-            "type": "ir.actions.act_url",
-            "url": self.access_url,
-        }
-    def _get_pdf_page_auto_fill(self, item, box):
-        """Render auto-fill field vào PDF cuối cùng"""
-        display_value = item.get("value") or item.get("default_value") or ""
 
-        if not display_value:
-            return None
+    def _notify(self, message=""):
+        """Notify the signers that a document is waiting for their signature.
 
-        packet = BytesIO()
-        can = canvas.Canvas(packet, pagesize=(box.getWidth(), box.getHeight()))
-
-        style = self._getParagraphStyle()
-        par = Paragraph(str(display_value), style=style)
+        Internal users handling their notifications in Odoo receive them
+        through ``message_notify``. The other signers are emailed: their
+        bodies are rendered in a single pass and the mails created together,
+        to be sent by the mail queue. When the system parameter
+        ``sign_oca.notification_rate`` is set, no more than that number of
+        mails per minute are scheduled.
+        """
+        if not self:
+            return self.env["mail.mail"]
+        attachments = {}
+        for request_record in self.request_id:
+            attachments[request_record] = (
+                request_record._get_notification_attachment().ids
+                if request_record.primary_attachment_filename
+                else []
+            )
+        author = self.env.user.partner_id
+        subject = self.env._("New document to sign")
+        subtype = self.env.ref("mail.mt_comment")
+        render_mixin = self.env["mail.render.mixin"]
+        vals_list = []
+        for signer in self:
+            signer._portal_ensure_token()
+            body = self.env["ir.qweb"]._render(
+                "sign_oca.sign_oca_template_mail",
+                {"record": signer, "body": message, "link": signer.access_url},
+                engine="ir.qweb",
+                minimal_qcontext=True,
+            )
+            if signer._is_notified_in_odoo():
+                signer.request_id.message_notify(
+                    body=body,
+                    partner_ids=signer.partner_id.ids,
+                    subject=subject,
+                    subtype_id=subtype.id,
+                    mail_auto_delete=False,
+                    email_layout_xmlid="mail.mail_notification_light",
+                    attachment_ids=attachments[signer.request_id],
+                )
+                continue
+            # Same layout as message_notify, without creating a notification
+            # per recipient
+            body = render_mixin._render_encapsulate(
+                "mail.mail_notification_light",
+                body,
+                add_context={
+                    "message": self.env["mail.message"]
+                    .sudo()
+                    .new({"body": body, "author_id": author.id}),
+                    "subtype": subtype,
+                },
+            )
+            vals_list.append(
+                {
+                    "subject": subject,
+                    "body_html": body,
+                    "author_id": author.id,
+                    "email_from": self.env.user.email_formatted,
+                    "model": signer.request_id._name,
+                    "res_id": signer.request_id.id,
+                    "record_name": signer.request_id.name,
+                    # Not shown in the chatter of the request
+                    "message_type": "user_notification",
+                    "subtype_id": subtype.id,
+                    "recipient_ids": [fields.Command.link(signer.partner_id.id)],
+                    "attachment_ids": [
+                        fields.Command.set(attachments[signer.request_id])
+                    ],
+                    "auto_delete": False,
+                }
+            )
+        dates = self._get_notification_dates(len(vals_list))
+        for vals, scheduled_date in zip(vals_list, dates, strict=True):
+            vals["scheduled_date"] = scheduled_date
+        return self.env["mail.mail"].sudo().create(vals_list)
 
-        width = item["width"] / 100 * float(box.getWidth())
-        height = item["height"] / 100 * float(box.getHeight())
-        par.wrap(width - 4, height - 4)
+    def _is_notified_in_odoo(self):
+        self.ensure_one()
+        return any(
+            user.notification_type == "inbox"
+            for user in self.partner_id.sudo().user_ids
+            if not user.share
+        )
 
-        par.drawOn(
-            can,
-            item["position_x"] / 100 * float(box.getWidth()) + 2,
-            (100 - item["position_y"] - item["height"]) / 100 * float(box.getHeight()) + 2,
+    @api.model
+    def _get_notification_dates(self, count):
+        """Date at which each of ``count`` mails can be sent."""
+        rate = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("sign_oca.notification_rate", 0)
+        )
+        if rate <= 0:
+            return [False] * count
+        now = fields.Datetime.now()
+        return [
+            now + timedelta(minutes=index // rate) if index >= rate else False
+            for index in range(count)
+        ]
+
+    def _get_page_manifest(self, access_token):
+        self.ensure_one()
+        manifest = self.request_id._get_page_manifest(
+            role=self.role_id if not self.signed_on else None
         )
+        manifest["url"] = f"/sign_oca/content/{self.id}/{access_token}/page/%s"
+        return manifest
 
-        can.save()
-        packet.seek(0)
-        new_pdf = PdfFileReader(packet)
-        return new_pdf.getPage(0)
+    def _get_render_status(self):
+        """State of the rendering of the signature of this signer."""
+        self.ensure_one()
+        job = self.env["sign.oca.render.job"].sudo().search(
+            [("signer_id", "=", self.id), ("job_type", "=", "sign")],
+            order="id desc",
+            limit=1,
+        )
+        if job:
+            state = job.state
+        else:
+            state = "done" if self.signed_on else "draft"
+        return {
+            "state": state,
+            "signed": bool(self.signed_on),
+            "request_state": self.request_id.state,
+            "url": self.access_url,
+        }
 
+    def _check_signed_revision(self):
+        """Check that the document signed by this signer is still the
+        beginning of the current document of the request."""
+        self.ensure_one()
+        if not self.signature_hash or not self.signed_data_size:
+            return False
+        with self.request_id._get_document() as (data, _reader):
+            data = data[: self.signed_data_size]
+        return hashlib.sha1(data).hexdigest() == self.signature_hash
+
+    @api.model
+    def _get_pdf_overlays(self, boxes, items, style=None):
+        """Draw ``items`` using a single overlay per page.
+
+        All the fields of a page are drawn on the same canvas, so each page
+        gets one overlay whatever the number of fields. Field types added by
+        other modules keep their own ``_get_pdf_page_<type>`` overlay.
+        ``boxes`` are the sizes of the pages by page number.
+        Returns ``({page_number: [overlay, ...]}, rendered_items)``.
+        """
+        style = style or self._getParagraphStyle()
+        overlays = {}
+        rendered = []
+        for page_number, page_items in pdf_render.group_items_by_page(items).items():
+            box = boxes[page_number]
+            page_overlays = overlays.setdefault(page_number, [])
+            overlay, drawn_items = pdf_render.render_overlay(page_items, box, style)
+            if overlay:
+                page_overlays.append(overlay)
+            rendered += drawn_items
+            for item in page_items:
+                if item["field_type"] in pdf_render.DRAWERS:
+                    continue
+                new_page = self._get_pdf_page(item, box)
+                if new_page:
+                    page_overlays.append(new_page)
+                    rendered.append(item)
+        return {key: value for key, value in overlays.items() if value}, rendered
+
+    @api.model
+    def _render_pdf_items(self, pages, items):
+        """Merge ``items`` into ``pages``, each page being merged once per
+        overlay. Returns the list of items that produced some output.
+        """
+        overlays, rendered = self._get_pdf_overlays(
+            {page_number: page.mediaBox for page_number, page in pages.items()}, items
+        )
+        for page_number, page_overlays in overlays.items():
+            for overlay in page_overlays:
+                pages[page_number].mergePage(overlay)
+        return rendered
+
+    @api.model
+    def _render_pdf_data(self, pdf_data, items, style=None, boxes=None, reader=None):
+        """Return ``(pdf_data, rendered_items)`` with ``items`` drawn.
+
+        The overlays are appended to the existing bytes as an incremental
+        update, so signing costs the size of the overlays and the previous
+        revision stays a byte prefix of the new one. Documents that cannot be
+        updated that way (encrypted, cross-reference streams...) are
+        rewritten as before. ``boxes`` are the stored sizes of the pages
+        (see ``sign.oca.request._get_page_boxes``); they are read from the
+        document when not given, as is ``reader`` when the document is not
+        already parsed.
+        """
+        reader = reader or PdfFileReader(BytesIO(pdf_data))
+        if boxes is None:
+            boxes = pdf_render.get_page_boxes(pdf_render.get_page_geometry(reader))
+        with instrumentation.span("render", items=len(items)):
+            overlays, rendered = self._get_pdf_overlays(boxes, items, style=style)
+        with instrumentation.span("merge", pages=len(overlays)):
+            pdf_data = pdf_incremental.write_overlays(pdf_data, reader, overlays)
+        return pdf_data, rendered
+
+    def _get_pdf_page_item(self, item, box):
+        page = pdf_render.render_overlay([item], box, self._getParagraphStyle())[0]
+        return page or False
 
+    def _get_pdf_page_auto_fill(self, item, box):
+        """Render auto-fill field vào PDF cuối cùng"""
+        return self._get_pdf_page_item(item, box)
 
-    
     def _render_all_fields_to_pdf(self, signatory_data, items, pages):
         """Render tất cả fields (bao gồm auto_fill) lên PDF"""
-        
+        to_render = []
         for key in signatory_data:
             item_data = signatory_data[key]
-            
+
             # Xác định data source
             if item_data["role_id"] == self.role_id.id and key in items:
                 # User input data
@@ -805,21 +1537,16 @@ class SignOcaRequestSigner(models.Model):
             else:
                 # Skip fields không thuộc signer này và không phải auto_fill
                 continue
-                
+
             # Validate required fields
             if item_data["role_id"] == self.role_id.id:
                 self._check_signable(item)
-                
-            try:
-                page = pages[item["page"]]
-                new_page = self._get_pdf_page(item, page.mediaBox)
-                if new_page:
-                    page.mergePage(new_page)
-                    pages[item["page"]] = page
-                    _logger.info(f"Rendered field {item.get('name', key)} to PDF")
-            except Exception as e:
-                _logger.error(f"Error rendering field {item.get('name', key)}: {e}")
-                
+            to_render.append(item)
+
+        try:
+            self._render_pdf_items(pages, to_render)
+        except Exception as e:
+            _logger.error("Error rendering fields: %s", e)
         return pages
 
     def _check_signable(self, item):
@@ -829,96 +1556,18 @@ class SignOcaRequestSigner(models.Model):
             raise ValidationError(self.env._("Field %s is not filled") % item["name"])
 
     def _get_pdf_page_text(self, item, box):
-        packet = BytesIO()
-        can = canvas.Canvas(packet, pagesize=(box.getWidth(), box.getHeight()))
-        if not item["value"]:
-            return False
-        par = Paragraph(item["value"], style=self._getParagraphStyle())
-        par.wrap(
-            item["width"] / 100 * float(box.getWidth()),
-            item["height"] / 100 * float(box.getHeight()),
-        )
-        par.drawOn(
-            can,
-            item["position_x"] / 100 * float(box.getWidth()),
-            (100 - item["position_y"] - item["height"]) / 100 * float(box.getHeight()),
-        )
-        can.save()
-        packet.seek(0)
-        new_pdf = PdfFileReader(packet)
-        return new_pdf.getPage(0)
+        return self._get_pdf_page_item(item, box)
 
     def _getParagraphStyle(self):
-        return ParagraphStyle(
-            name="Oca Sign Style",
-            fontName="DejaVuSans",  
-            fontSize=10,
-            leading=12,            
-            textColor=colors.black,
-        )
-
+        if len(self.request_id) == 1:
+            return self.request_id._get_paragraph_style()
+        return pdf_render.get_paragraph_style()
 
     def _get_pdf_page_check(self, item, box):
-        packet = BytesIO()
-        can = canvas.Canvas(packet, pagesize=(box.getWidth(), box.getHeight()))
-        width = item["width"] / 100 * float(box.getWidth())
-        height = item["height"] / 100 * float(box.getHeight())
-        drawing = Drawing(width=width, height=height)
-        drawing.add(
-            Rect(
-                0,
-                0,
-                width,
-                height,
-                strokeWidth=3,
-                strokeColor=black,
-                fillColor=transparent,
-            )
-        )
-        if item["value"]:
-            drawing.add(Line(0, 0, width, height, strokeColor=black, strokeWidth=3))
-            drawing.add(Line(0, height, width, 0, strokeColor=black, strokeWidth=3))
-        drawing.drawOn(
-            can,
-            item["position_x"] / 100 * float(box.getWidth()),
-            (100 - item["position_y"] - item["height"]) / 100 * float(box.getHeight()),
-        )
-        can.save()
-        packet.seek(0)
-        new_pdf = PdfFileReader(packet)
-        return new_pdf.getPage(0)
+        return self._get_pdf_page_item(item, box)
 
     def _get_pdf_page_signature(self, item, box):
-        packet = BytesIO()
-        can = canvas.Canvas(packet, pagesize=(box.getWidth(), box.getHeight()))
-        if not item["value"]:
-            return False
-        try:
-            base64_str = item["value"]
-            if len(base64_str) % 4:
-                base64_str += "=" * (4 - len(base64_str) % 4)
-            if "," in base64_str:
-                base64_str = item["value"].split(",")[1]
-            image_data = b64decode(base64_str)
-            par = Image(
-                BytesIO(image_data),
-                width=item["width"] / 100 * float(box.getWidth()),
-                height=item["height"] / 100 * float(box.getHeight()),
-            )
-            par.drawOn(
-                can,
-                item["position_x"] / 100 * float(box.getWidth()),
-                (100 - item["position_y"] - item["height"])
-                / 100
-                * float(box.getHeight()),
-            )
-        except Exception as e:
-            _logger.info(f"Error decoding Base64 string: {e}")
-            return False
-        can.save()
-        packet.seek(0)
-        new_pdf = PdfFileReader(packet)
-        return new_pdf.getPage(0)
+        return self._get_pdf_page_item(item, box)
 
     def _get_pdf_page(self, item, box):
         return getattr(self, f"_get_pdf_page_{ item['field_type'] }")(item, box)
@@ -941,12 +1590,160 @@ class SignOcaRequestSigner(models.Model):
         + r._get_integrity_hash_fields()
     )
     def _compute_altered_hash(self):
+        chained = self.filtered("inalterable_hash")
+        previous_hashes = chained._get_previous_hashes()
+        hash_items = chained._get_hash_items()
         for record in self:
-            record.altered_hash = (
+            record.altered_hash = bool(record.inalterable_hash) and (
                 record.inalterable_hash
-                and record.inalterable_hash
-                != record._get_new_hash(record.secure_sequence_number)
+                != record._compute_hash(
+                    previous_hashes.get(record.id, ""),
+                    items=hash_items[(record.request_id.id, record.role_id.id)],
+                )
+            )
+
+    def _get_previous_hashes(self):
+        """Return ``{signer_id: hash of the previous signer}`` in one query."""
+        numbers = {
+            record.secure_sequence_number - 1
+            for record in self
+            if record.secure_sequence_number
+        }
+        if not numbers:
+            return {}
+        previous = self.sudo().search_fetch(
+            [
+                ("sequence_id", "in", self.sequence_id.ids),
+                ("secure_sequence_number", "!=", 0),
+                ("secure_sequence_number", "in", list(numbers)),
+            ],
+            ["sequence_id", "secure_sequence_number", "inalterable_hash"],
+        )
+        hashes = {
+            (signer.sequence_id.id, signer.secure_sequence_number): (
+                signer.inalterable_hash
+            )
+            for signer in previous
+        }
+        return {
+            record.id: hashes.get(
+                (record.sequence_id.id, record.secure_sequence_number - 1)
+            )
+            or ""
+            for record in self
+        }
+
+    def _get_hash_items(self):
+        """Return the items hashed with the signers, by request and role.
+
+        Signers without items get an empty recordset.
+        """
+        no_items = self.env["sign.oca.request.item"].sudo()
+        items = {
+            (record.request_id.id, record.role_id.id): no_items for record in self
+        }
+        for item in (
+            self.env["sign.oca.request.item"]
+            .sudo()
+            .search([("request_id", "in", self.request_id.ids)])
+        ):
+            key = (item.request_id.id, item.role_id.id)
+            if key in items:
+                items[key] |= item
+        return items
+
+    @api.model
+    def _verify_chains(self, batch_size=1000):
+        """Check all the inalterability chains in a single ordered pass.
+
+        Each chain is read by batches of ``batch_size`` signers ordered by
+        number, every hash being checked against the stored hash of the
+        signer before it. Yields ``(signer, issue)`` where ``issue`` is
+        ``"gap"`` for a missing number before the signer and ``"altered"``
+        when its hash does not match.
+        """
+        signers = self.sudo()
+        for [sequence] in signers._read_group(
+            [("secure_sequence_number", "!=", 0)], ["sequence_id"]
+        ):
+            previous_number = None
+            previous_hash = ""
+            while True:
+                batch = signers.search_fetch(
+                    [
+                        ("sequence_id", "=", sequence.id),
+                        ("secure_sequence_number", ">", previous_number or 0),
+                    ],
+                    ["secure_sequence_number", "inalterable_hash", "request_id"]
+                    + self._get_integrity_hash_fields(),
+                    order="secure_sequence_number",
+                    limit=batch_size,
+                )
+                if not batch:
+                    break
+                hash_items = batch._get_hash_items()
+                for signer in batch:
+                    number = signer.secure_sequence_number
+                    if previous_number is not None and number != previous_number + 1:
+                        yield signer, "gap"
+                        # As when the signer was chained, nothing before it
+                        previous_hash = ""
+                    expected_hash = signer._compute_hash(
+                        previous_hash,
+                        items=hash_items[(signer.request_id.id, signer.role_id.id)],
+                    )
+                    if expected_hash != signer.inalterable_hash:
+                        yield signer, "altered"
+                    previous_number, previous_hash = number, signer.inalterable_hash
+                batch.invalidate_recordset()
+
+    def _chain_hashes(self):
+        """Give the next numbers of the sequence to the signers, in order,
+        and chain their hashes.
+
+        The hash of the previous signer is kept from one signer to the next
+        one, it is only searched when the numbers are not consecutive.
+        """
+        self.flush_recordset()
+        with instrumentation.span("hash", self.env.cr, signers=len(self)):
+            self._chain_next_hashes()
+
+    def _chain_next_hashes(self):
+        previous_number = previous_hash = None
+        for signer in self:
+            new_number = int(signer.sequence_id.next_by_id())
+            if previous_number is not None and new_number == previous_number + 1:
+                new_hash = signer._compute_hash(previous_hash)
+            else:
+                new_hash = signer._get_new_hash(new_number)
+            signer.write(
+                {
+                    "secure_sequence_number": new_number,
+                    "inalterable_hash": new_hash,
+                    "hash_state": "chained",
+                }
             )
+            previous_number, previous_hash = new_number, new_hash
+
+    @api.model
+    def _cron_chain_hashes(self, limit=500):
+        """Chain the pending signatures, oldest first.
+
+        A transaction level advisory lock keeps a single writer on the
+        chains; a run finding it taken leaves the work to the current one.
+        """
+        self.env.cr.execute("SELECT pg_try_advisory_xact_lock(%s)", (HASH_CHAIN_LOCK,))
+        if not self.env.cr.fetchone()[0]:
+            return
+        signers = self.sudo().search(
+            [("hash_state", "=", "pending")], order="signed_on, id", limit=limit
+        )
+        for sequence in signers.sequence_id:
+            signers.filtered(lambda s: s.sequence_id == sequence)._chain_hashes()
+        if not self.env.registry.in_test_mode():
+            self.env.cr.commit()  # pylint: disable=invalid-commit
+        if len(signers) == limit:
+            self.env.ref("sign_oca.ir_cron_sign_oca_hash_chain")._trigger()
 
     def _get_new_hash(self, secure_seq_number):
         prev_sign = self.sudo().search(
@@ -965,16 +1762,18 @@ class SignOcaRequestSigner(models.Model):
             )
         return self._compute_hash(prev_sign.inalterable_hash if prev_sign else "")
 
-    def _compute_hash(self, previous_hash):
+    def _compute_hash(self, previous_hash, items=None):
         """Computes the hash of the browse_record given as self, based on the hash
         of the previous record in the company's securisation sequence given as
         parameter
         """
         self.ensure_one()
-        hash_string = sha256((previous_hash + self._string_to_hash()).encode("utf-8"))
+        hash_string = sha256(
+            (previous_hash + self._string_to_hash(items=items)).encode("utf-8")
+        )
         return hash_string.hexdigest()
 
-    def _string_to_hash(self):
+    def _string_to_hash(self, items=None):
         def _getattrstring(obj, field_str):
             field_value = obj[field_str]
             if obj._fields[field_str].type == "many2one":
@@ -986,9 +1785,10 @@ class SignOcaRequestSigner(models.Model):
         values = {"items": {}}
         for field in self._get_integrity_hash_fields():
             values[field] = _getattrstring(self, field)
-        for key, signatory_value in self.request_id.signatory_data.items():
-            if signatory_value["role_id"] == self.role_id.id:
-                values[key] = signatory_value
+        if items is None:
+            items = self.request_id._get_role_items(self.role_id)
+        for item in items:
+            values[str(item.item_key)] = item.item_data
         return json.dumps(
             values,
             sort_keys=True,
@@ -1000,8 +1800,64 @@ class SignOcaRequestSigner(models.Model):
     def _get_integrity_hash_fields(self):
         return ["partner_id", "role_id", "signed_on", "signature_hash"]
 
-        
+
+
+class SignOcaRequestItem(models.Model):
+    _name = "sign.oca.request.item"
+    _description = "Sign Request Item"
+    _order = "request_id, item_key"
+
+    request_id = fields.Many2one(
+        "sign.oca.request", required=True, ondelete="cascade", index=True
+    )
+    item_key = fields.Integer(required=True, help="Key in signatory_data")
+    role_id = fields.Many2one("sign.oca.role", index=True)
+    page = fields.Integer(index=True)
+    field_type = fields.Char(index=True)
+    tabindex = fields.Integer(default=999999)
+    item_data = fields.Serialized(
+        help="Item as exposed in signatory_data. The other fields are "
+        "extracted from it to be searchable."
+    )
+
+    _sql_constraints = [
+        (
+            "request_item_key_unique",
+            "unique(request_id, item_key)",
+            "The key of an item must be unique in a request.",
+        )
+    ]
+
+    @api.model
+    def _get_indexed_vals(self, item_data):
+        tabindex = item_data.get("tabindex")
+        return {
+            "role_id": item_data.get("role_id") or False,
+            "page": item_data.get("page") or 0,
+            "field_type": item_data.get("field_type") or False,
+            "tabindex": 999999 if tabindex is None else tabindex,
+        }
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        for vals in vals_list:
+            if "item_data" in vals:
+                vals.update(self._get_indexed_vals(vals["item_data"] or {}))
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if "item_data" in vals:
+            vals = dict(vals, **self._get_indexed_vals(vals["item_data"] or {}))
+        return super().write(vals)
+
+
 class SignRequestLog(models.Model):
+    """Actions done on the requests, kept for auditing.
+
+    Logs are buffered on the cursor and inserted all at once just before
+    the transaction commits, a transaction that is rolled back logs nothing.
+    """
+
     _name = "sign.oca.request.log"
     _description = "Sign Request Log"
     _log_access = False
@@ -1034,4 +1890,64 @@ class SignRequestLog(models.Model):
         required=True,
     )
     access_token = fields.Char()
-    ip = fields.Char()
\ No newline at end of file
+    ip = fields.Char()
+
+    def init(self):
+        create_index(
+            self.env.cr,
+            "sign_oca_request_log_request_date_index",
+            self._table,
+            ["request_id", "date"],
+        )
+        create_index(
+            self.env.cr,
+            "sign_oca_request_log_action_date_index",
+            self._table,
+            ["action", "date"],
+        )
+
+    @api.model
+    def _add_to_buffer(self, vals):
+        buffer = self.env.cr.precommit.data.setdefault("sign_oca.request.log", [])
+        if not buffer:
+            self.env.cr.precommit.add(self._flush_buffer)
+        buffer.append(vals)
+
+    @api.model
+    def _flush_buffer(self):
+        vals_list = self.env.cr.precommit.data.pop("sign_oca.request.log", [])
+        if vals_list:
+            self.sudo().create(vals_list)
+
+    @api.model
+    def _cron_gc_view_logs(self, limit=10000):
+        """Remove the view logs older than the retention period.
+
+        Views are logged on every display of a document and are only useful
+        for a while; the other actions are kept forever.
+        """
+        days = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("sign_oca.view_log_retention_days", 90)
+        )
+        if days <= 0:
+            return 0
+        self.env.cr.execute(
+            """
+            DELETE FROM sign_oca_request_log
+             WHERE id IN (
+                   SELECT id
+                     FROM sign_oca_request_log
+                    WHERE action = 'view'
+                      AND date < (now() at time zone 'UTC') - %s * interval '1 day'
+                    LIMIT %s
+             )
+            """,
+            (days, limit),
+        )
+        count = self.env.cr.rowcount
+        self.invalidate_model()
+        if count == limit:
+            self.env.ref("sign_oca.ir_cron_sign_oca_gc_view_logs")._trigger()
+        return count
@@ -0,0 +1,87 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+from base64 import b64encode
+
+from psycopg2 import IntegrityError
+
+from odoo import api, fields, models
+from odoo.exceptions import MissingError
+
+from ..tools import pdf_render
+
+
+class SignOcaRequestPage(models.Model):
+    """Pages of a request document split as single page documents.
+
+    Pages are cached for a version of the document (``content_hash``), the
+    pages of the previous versions are dropped when a newer one is split.
+    """
+
+    _name = "sign.oca.request.page"
+    _description = "Sign Request Page"
+    _order = "request_id, page"
+
+    request_id = fields.Many2one(
+        "sign.oca.request", required=True, ondelete="cascade", index=True
+    )
+    content_hash = fields.Char(required=True)
+    page = fields.Integer(required=True)
+    data = fields.Binary(attachment=True)
+
+    _sql_constraints = [
+        (
+            "request_page_unique",
+            "unique(request_id, content_hash, page)",
+            "A page can only be split once for a version of the document.",
+        )
+    ]
+
+    def _search_page(self, request, content_hash, page_number):
+        return self.search(
+            [
+                ("request_id", "=", request.id),
+                ("content_hash", "=", content_hash),
+                ("page", "=", page_number),
+            ],
+            limit=1,
+        )
+
+    @api.model
+    def _get_page(self, request, page_number):
+        """Return the cached page ``page_number`` of ``request``, split it
+        from the current document when needed."""
+        pages = self.sudo()
+        content_hash = request._get_content_hash()
+        page = pages._search_page(request, content_hash, page_number)
+        if page:
+            return page
+        if page_number not in {int(number) for number in request._get_page_geometry()}:
+            raise MissingError(self.env._("Page %s does not exist.", page_number))
+        with request._get_document() as (pdf_data, _reader):
+            data = pdf_render.extract_page(pdf_data, page_number)
+        pages.search(
+            [("request_id", "=", request.id), ("content_hash", "!=", content_hash)]
+        ).unlink()
+        try:
+            with self.env.cr.savepoint():
+                page = pages.create(
+                    {
+                        "request_id": request.id,
+                        "content_hash": content_hash,
+                        "page": page_number,
+                        "data": b64encode(data),
+                    }
+                )
+        except IntegrityError:
+            # Split at the same time by another worker
+            page = pages._search_page(request, content_hash, page_number)
+        return page
+
+    def _get_data_stream(self):
+        self.ensure_one()
+        stream = self.env["ir.binary"]._get_stream_from(
+            self, "data", mimetype="application/pdf"
+        )
+        stream.etag = f"{self.content_hash}-{self.page}"
+        return stream
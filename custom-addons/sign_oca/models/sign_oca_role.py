@@ -42,10 +42,21 @@ class SignOcaRole(models.Model):
                 item.default_partner_id = False
 
     def _get_partner_from_record(self, record):
-        partner = self.default_partner_id.id or False
-        if self.partner_selection_policy == "expression" and record:
-            res = self.env["mail.render.mixin"]._render_template(
-                self.expression_partner, record._name, record.ids
-            )[record.id]
-            partner = int(res) if res else False
-        return partner
+        if not record:
+            return self.default_partner_id.id or False
+        return self._get_partners_from_records(record)[record.id]
+
+    def _get_partners_from_records(self, records):
+        """Return ``{record_id: partner_id}`` for ``records``.
+
+        The expression is rendered once for all the records.
+        """
+        self.ensure_one()
+        if self.partner_selection_policy != "expression" or not records:
+            return dict.fromkeys(records.ids, self.default_partner_id.id or False)
+        rendered = self.env["mail.render.mixin"]._render_template(
+            self.expression_partner, records._name, records.ids
+        )
+        return {
+            record_id: int(res) if res else False for record_id, res in rendered.items()
+        }
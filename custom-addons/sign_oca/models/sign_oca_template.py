@@ -2,10 +2,12 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 import logging
-from odoo import api, fields, models
+from odoo import Command, api, fields, models
 from odoo.exceptions import ValidationError
 import base64
 
+from ..tools import pdf_fonts, pdf_render
+
 _logger = logging.getLogger(__name__)
 
 
@@ -17,8 +19,18 @@ class SignOcaTemplate(models.Model):
     name = fields.Char(required=True)
     data = fields.Binary(attachment=True, required=True)
     ask_location = fields.Boolean()
+    font_family = fields.Selection(
+        selection=lambda self: pdf_fonts.get_font_selection(),
+        default=pdf_fonts.DEFAULT_FONT,
+        help="Font of the values written in the document",
+    )
+    font_size = fields.Integer(default=pdf_fonts.DEFAULT_FONT_SIZE)
     filename = fields.Char()
     item_ids = fields.One2many("sign.oca.template.item", inverse_name="template_id")
+    page_ids = fields.One2many(
+        "sign.oca.template.page", inverse_name="template_id", readonly=True
+    )
+    page_count = fields.Integer(compute="_compute_page_count", store=True)
     request_count = fields.Integer(compute="_compute_request_count")
     model_id = fields.Many2one(
         comodel_name="ir.model",
@@ -46,11 +58,18 @@ class SignOcaTemplate(models.Model):
     primary_attachment_filename = fields.Char(
         
     )
+    @api.constrains("font_size")
+    def _check_font_size(self):
+        for record in self:
+            if record.font_size <= 0:
+                raise ValidationError(self.env._("The font size must be positive."))
+
     @api.constrains('primary_attachment')
     def _check_file_size(self):
         for record in self:
-            if record.primary_attachment:
-                file_size = len(base64.b64decode(record.primary_attachment))
+            attachment = record._get_primary_attachment()
+            if attachment:
+                file_size = attachment.file_size
                 max_size = 8 * 1024 * 1024  
                 if file_size > max_size:
                     raise ValidationError(
@@ -59,6 +78,54 @@ class SignOcaTemplate(models.Model):
                         
                     )
 
+    @api.depends("page_ids")
+    def _compute_page_count(self):
+        for record in self:
+            record.page_count = len(record.page_ids)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        records._update_page_geometry()
+        records.item_ids._check_page()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if "data" in vals:
+            self._update_page_geometry()
+            self.item_ids._check_page()
+        return res
+
+    def _update_page_geometry(self):
+        """Read the pages of the document once and store their size."""
+        for record in self:
+            geometry = {}
+            data = record.with_context(bin_size=False).data
+            if data:
+                try:
+                    geometry = pdf_render.get_page_geometry(base64.b64decode(data))
+                except Exception as e:
+                    _logger.warning(
+                        "Cannot read the pages of template %s: %s", record.id, e
+                    )
+            record.page_ids = [Command.clear()] + [
+                Command.create(dict(page, page=page_number))
+                for page_number, page in geometry.items()
+            ]
+
+    def _get_page_geometry(self):
+        """Return ``{page_number: {"width", "height", "rotation"}}``."""
+        self.ensure_one()
+        return {
+            page.page: {
+                "width": page.width,
+                "height": page.height,
+                "rotation": page.rotation,
+            }
+            for page in self.page_ids
+        }
+
     @api.depends("model_id")
     def _compute_model(self):
         for item in self:
@@ -75,6 +142,54 @@ class SignOcaTemplate(models.Model):
         for record in self:
             record.request_count = res_dict.get(record.id, 0)
 
+    def _get_data_attachment(self):
+        self.ensure_one()
+        return (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_id", "=", self.id),
+                    ("res_field", "=", "data"),
+                ],
+                limit=1,
+            )
+        )
+
+    def _get_primary_attachment(self):
+        self.ensure_one()
+        return (
+            self.env["ir.attachment"]
+            .sudo()
+            .search(
+                [
+                    ("res_model", "=", self._name),
+                    ("res_id", "=", self.id),
+                    ("res_field", "=", "primary_attachment"),
+                ],
+                limit=1,
+            )
+        )
+
+    def action_data_storage_report(self):
+        report = self.env["sign.oca.request"]._get_data_storage_report(self.ids)
+        return {
+            "type": "ir.actions.client",
+            "tag": "display_notification",
+            "params": {
+                "title": self.env._("Document storage"),
+                "message": self.env._(
+                    "%(request_count)s requests, %(shared_count)s still sharing "
+                    "the template document. %(logical_size)s bytes of documents "
+                    "use %(stored_size)s bytes of storage (%(saved_size)s bytes "
+                    "saved).",
+                    **report,
+                ),
+                "sticky": True,
+            },
+        }
+
     def configure(self):
         self.ensure_one()
         return {
@@ -92,6 +207,7 @@ class SignOcaTemplate(models.Model):
         return {
             "name": self.name,
             "items": {item.id: item.get_info() for item in self.item_ids},
+            "pages": [page.get_info() for page in self.page_ids],
             "roles": [
                 {"id": role.id, "name": role.name}
                 for role in self.env["sign.oca.role"].search([])
@@ -119,41 +235,67 @@ class SignOcaTemplate(models.Model):
         item_vals["template_id"] = self.id
         return self.env["sign.oca.template.item"].create(item_vals).get_info()
 
-    def _get_signatory_data(self, record=None):
-        """Get signatory data with role-aware auto fill support"""
-        items = sorted(
+    def _get_sorted_items(self):
+        return sorted(
             self.item_ids,
             key=lambda item: (item.page, item.position_y, item.position_x),
         )
+
+    def _get_role_partners(self, records):
+        """Return ``{role: {record_id: partner_id}}`` for the roles of the
+        items, each role expression being rendered once for all ``records``."""
+        roles = self.item_ids.role_id.filtered(
+            lambda role: role.partner_selection_policy != "empty"
+        )
+        return {role: role._get_partners_from_records(records) for role in roles}
+
+    def _get_auto_fill_values(self, records, role_partners=None):
+        """Return the value of every auto fill item for every record.
+
+        The result is ``{record_id: {item_id: value}}``. Each item is
+        resolved for all the records at once. ``role_partners`` is the
+        result of ``_get_role_partners``, computed when not given.
+        """
+        self.ensure_one()
+        if role_partners is None:
+            role_partners = self._get_role_partners(records)
+        values = {record.id: {} for record in records}
+        for item in self._get_sorted_items():
+            if item.field_id.field_type != "auto_fill":
+                continue
+            try:
+                item_values = item.field_id._extract_values_from_records(
+                    records, item.role_id, role_partners=role_partners.get(item.role_id)
+                )
+            except Exception as e:
+                _logger.error(
+                    "Failed to auto-fill field '%s': %s", item.field_id.name, e
+                )
+                item_values = dict.fromkeys(records.ids, "")
+            for record_id, value in item_values.items():
+                values[record_id][item.id] = value
+        return values
+
+    def _get_signatory_data(self, record=None, auto_fill_values=None):
+        """Get signatory data with role-aware auto fill support
+
+        ``auto_fill_values`` are the values of ``record`` returned by
+        ``_get_auto_fill_values``, computed when not given.
+        """
+        items = self._get_sorted_items()
         
         signatory_data = {}
         tabindex = 1
         item_id = 1
         
-        # Pre-fetch all auto-fill fields if record provided
+        # Items sharing a field share the value of the last of them
         auto_fill_cache = {}
         if record:
-            auto_fill_fields = [item for item in items if item.field_id.field_type == 'auto_fill']
-            if auto_fill_fields:
-                _logger.info(f"Processing {len(auto_fill_fields)} auto-fill fields for record {record._name}({record.id})")
-                for item in auto_fill_fields:
-                    try:
-                        # 🔥 NEW: Prepare role context
-                        role_context = {
-                            'role_id': item.role_id.id if item.role_id else None,
-                            'role_name': item.role_id.name if item.role_id else None,
-                        }
-                        
-                        # Extract with role context
-                        value = item.field_id.extract_value_from_record(record, role_context)
-                        auto_fill_cache[item.field_id.id] = value
-                        
-                        if value:
-                            role_info = f" (role: {role_context['role_name']})" if role_context['role_id'] else " (no role)"
-                            _logger.info(f"Auto-filled field '{item.field_id.name}'{role_info} with value: '{value}'")
-                    except Exception as e:
-                        _logger.error(f"Failed to auto-fill field '{item.field_id.name}': {e}")
-                        auto_fill_cache[item.field_id.id] = ""
+            if auto_fill_values is None:
+                auto_fill_values = self._get_auto_fill_values(record)[record.id]
+            for item in items:
+                if item.id in auto_fill_values:
+                    auto_fill_cache[item.field_id.id] = auto_fill_values[item.id]
         
         # Build signatory data with auto-fill values (rest remains same)
         for item in items:
@@ -178,14 +320,41 @@ class SignOcaTemplate(models.Model):
         
         return signatory_data
 
-    def _prepare_sign_oca_request_vals_from_record(self, record):
-        """Prepare request values with auto-fill data populated"""
-        roles = self.mapped("item_ids.role_id").filtered(
-            lambda x: x.partner_selection_policy != "empty"
+    def _prepare_sign_oca_request_vals_from_records(self, records):
+        """Prepare the values of one request per record"""
+        self.ensure_one()
+        role_partners = self._get_role_partners(records)
+        auto_fill_values = self._get_auto_fill_values(
+            records, role_partners=role_partners
         )
+        return [
+            self._prepare_sign_oca_request_vals_from_record(
+                record,
+                auto_fill_values=auto_fill_values[record.id],
+                role_partners=role_partners,
+            )
+            for record in records
+        ]
+
+    def _prepare_sign_oca_request_vals_from_record(
+        self, record, auto_fill_values=None, role_partners=None
+    ):
+        """Prepare request values with auto-fill data populated
+
+        ``role_partners`` is the result of ``_get_role_partners``, computed
+        for ``record`` when not given.
+        """
+        if role_partners is None:
+            role_partners = self._get_role_partners(record)
+        if auto_fill_values is None:
+            auto_fill_values = self._get_auto_fill_values(
+                record, role_partners=role_partners
+            )[record.id]
         
         # Get signatory data with auto-fill populated
-        signatory_data = self._get_signatory_data(record)
+        signatory_data = self._get_signatory_data(
+            record, auto_fill_values=auto_fill_values
+        )
         
         
         return {
@@ -193,49 +362,48 @@ class SignOcaTemplate(models.Model):
             "template_id": self.id,
             "record_ref": f"{record._name},{record.id}",
             "signatory_data": signatory_data,
-            "data": self.data,
             "signer_ids": [
                 (
                     0,
                     0,
                     {
-                        "partner_id": role._get_partner_from_record(record),
+                        "partner_id": partners[record.id],
                         "role_id": role.id,
                     },
                 )
-                for role in roles
+                for role, partners in role_partners.items()
             ],
         }
 
     def debug_auto_fill(self, record):
         """Debug method để kiểm tra auto fill functionality"""
-        _logger.info(f"=== DEBUG AUTO FILL ===")
-        _logger.info(f"Template: {self.name}")
-        _logger.info(f"Record: {record._name} - {record.id}")
+        _logger.info("=== DEBUG AUTO FILL ===")
+        _logger.info("Template: %s", self.name)
+        _logger.info("Record: %s - %s", record._name, record.id)
         
         # Check template items - sử dụng filtered() trên recordset thay vì list
         auto_fill_items = self.item_ids.filtered(lambda x: x.field_id.field_type == 'auto_fill')
-        _logger.info(f"Auto fill items found: {len(auto_fill_items)}")
+        _logger.info("Auto fill items found: %s", len(auto_fill_items))
         
         for item in auto_fill_items:
             field_obj = item.field_id
-            _logger.info(f"Field: {field_obj.name}")
-            _logger.info(f"HR Selection: {field_obj.hr_field_selection}")
+            _logger.info("Field: %s", field_obj.name)
+            _logger.info("HR Selection: %s", field_obj.hr_field_selection)
             
             # Test extraction
             try:
                 value = field_obj.extract_value_from_record(record)
-                _logger.info(f"Extracted value: '{value}'")
+                _logger.info("Extracted value: %r", value)
             except Exception as e:
-                _logger.error(f"Extract error: {e}")
+                _logger.error("Extract error: %s", e)
         
         # Check signatory data
         signatory_data = self._get_signatory_data(record)
         auto_fill_data = {k: v for k, v in signatory_data.items() 
                         if v.get('field_type') == 'auto_fill'}
-        _logger.info(f"Auto fill in signatory_data: {len(auto_fill_data)} items")
+        _logger.info("Auto fill in signatory_data: %s items", len(auto_fill_data))
         for k, v in auto_fill_data.items():
-            _logger.info(f"  Item {k}: {v.get('name')} = '{v.get('value')}'")
+            _logger.info("  Item %s: %s = %r", k, v.get("name"), v.get("value"))
         
         return signatory_data
 
@@ -264,6 +432,22 @@ class SignOcaTemplateItem(models.Model):
     def _get_default_role(self):
         return self.env.ref("sign_oca.sign_role_customer")
 
+    @api.constrains("page", "template_id")
+    def _check_page(self):
+        for item in self:
+            page_count = item.template_id.page_count
+            if item.page < 1 or (page_count and item.page > page_count):
+                raise ValidationError(
+                    self.env._(
+                        "Field %(field)s is on page %(page)s but the document "
+                        "of template %(template)s has %(page_count)s pages.",
+                        field=item.field_id.name or "",
+                        page=item.page,
+                        template=item.template_id.name,
+                        page_count=page_count,
+                    )
+                )
+
     def get_info(self):
         """Legacy method - kept for compatibility"""
         return self.get_base_info()
@@ -283,4 +467,35 @@ class SignOcaTemplateItem(models.Model):
             "height": self.height,
             "placeholder": self.placeholder,
             "required": self.required,
-        }
\ No newline at end of file
+        }
+
+
+class SignOcaTemplatePage(models.Model):
+    _name = "sign.oca.template.page"
+    _description = "Sign Oca Template Page"
+    _order = "template_id, page"
+
+    template_id = fields.Many2one(
+        "sign.oca.template", required=True, ondelete="cascade", index=True
+    )
+    page = fields.Integer(required=True)
+    width = fields.Float(help="Width of the page in points")
+    height = fields.Float(help="Height of the page in points")
+    rotation = fields.Integer()
+
+    _sql_constraints = [
+        (
+            "template_page_unique",
+            "unique(template_id, page)",
+            "A page can only be defined once in a template.",
+        )
+    ]
+
+    def get_info(self):
+        self.ensure_one()
+        return {
+            "page": self.page,
+            "width": self.width,
+            "height": self.height,
+            "rotation": self.rotation,
+        }
@@ -16,7 +16,8 @@ export default class SignOcaPdfCommon extends Component {
         this.orm = useService("orm");
         this.field_template = "sign_oca.sign_iframe_field";
         this.pdf_url = this.getPdfUrl();
-        this.viewer_url = "/web/static/lib/pdfjs/web/viewer.html?file=" + this.pdf_url;
+        this.viewer_url = "/web/static/lib/pdfjs/web/viewer.html?file=" +
+            encodeURIComponent(this.pdf_url);
         this.iframe = useRef("sign_oca_iframe");
         var iframeResolve = "";
         var iframeReject = "";
@@ -124,6 +125,10 @@ export default class SignOcaPdfCommon extends Component {
         }
         
         var page = this.iframe.el.contentDocument.getElementsByClassName("page")[item.page - 1];
+        if (!page) {
+            console.warn(`Page ${item.page} not found for item`, item.id);
+            return;
+        }
         var signatureItem = $(
             renderToString(this.field_template, {
                 ...item,
@@ -3,6 +3,7 @@
 
 import {App, useRef, whenReady} from "@odoo/owl";
 import {_t} from "@web/core/l10n/translation";
+import {AlertDialog} from "@web/core/confirmation_dialog/confirmation_dialog";
 import {makeEnv, startServices} from "@web/env";
 import SignOcaPdf from "../sign_oca_pdf/sign_oca_pdf.esm.js";
 import {getTemplate} from "@web/core/templates";
@@ -33,7 +34,12 @@ export class SignOcaPdfPortal extends SignOcaPdf {
     }
 
     getPdfUrl() {
-        return "/sign_oca/content/" + this.signer_id + "/" + this.access_token;
+        var url = "/sign_oca/content/" + this.signer_id + "/" + this.access_token;
+        if (this.props.content_hash) {
+            // Versioned URL, cached by the browser until the document changes
+            url += "?hash=" + encodeURIComponent(this.props.content_hash);
+        }
+        return url;
     }
 
     checkToSign() {
@@ -174,7 +180,23 @@ export class SignOcaPdfPortal extends SignOcaPdf {
             items: this.info.items,
             latitude: position && position.coords && position.coords.latitude,
             longitude: position && position.coords && position.coords.longitude,
-        }).then((action) => {
+        }).then(async (action) => {
+            if (action.pending) {
+                // The document is rendered in background
+                const status = await this._waitRendering();
+                if (!status || status.state === "failed") {
+                    ev.target.disabled = false;
+                    return this.dialogService.add(AlertDialog, {
+                        body: status
+                            ? _t(
+                                  "The signed document could not be generated. Please contact the sender of the document."
+                              )
+                            : _t(
+                                  "The signed document is still being generated. Please reload the page in a few minutes."
+                              ),
+                    });
+                }
+            }
             // Giữ nguyên logic redirect
             if (action.type === "ir.actions.act_url") {
                 window.location = action.url;
@@ -184,6 +206,20 @@ export class SignOcaPdfPortal extends SignOcaPdf {
         });
     }
 
+    async _waitRendering(delay = 1000, maxDelay = 10000, timeout = 120000) {
+        const start = Date.now();
+        while (Date.now() - start < timeout) {
+            const status = await this.rpc(
+                "/sign_oca/status/" + this.signer_id + "/" + this.access_token
+            );
+            if (status.state !== "pending") {
+                return status;
+            }
+            await new Promise((resolve) => setTimeout(resolve, delay));
+            delay = Math.min(delay * 2, maxDelay);
+        }
+    }
+
     // 🔥 HELPER: Debug info
     _debugPortalState() {
         console.log('[Portal Debug]', {
@@ -200,6 +236,7 @@ SignOcaPdfPortal.template = "sign_oca.SignOcaPdfPortal";
 SignOcaPdfPortal.props = {
     access_token: String,
     signer_id: Number,
+    content_hash: {type: String, optional: true},
 };
 SignOcaPdfPortal.components = {MainComponentsContainer};
 
@@ -214,6 +251,7 @@ export async function initDocumentToSign(document, sign_oca_backend_info) {
         props: {
             access_token: sign_oca_backend_info.access_token,
             signer_id: sign_oca_backend_info.signer_id,
+            content_hash: sign_oca_backend_info.content_hash || undefined,
         },
         translateFn: _t,
         translatableAttributes: ["data-tooltip"],
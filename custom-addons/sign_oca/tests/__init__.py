@@ -1,2 +1,3 @@
 from . import test_sign
+from . import test_sign_benchmark
 from . import test_sign_portal
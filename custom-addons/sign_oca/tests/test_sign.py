@@ -2,14 +2,21 @@
 # License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
 
 import base64
+from io import BytesIO
+from unittest.mock import patch
 
 import requests
+from PyPDF2 import PdfFileReader
 
+from odoo import fields
+from odoo.exceptions import ValidationError
 from odoo.tests import Form
 from odoo.tools import misc
 
 from odoo.addons.base.tests.common import BaseCommon
 
+from ..tools import pdf_cache, pdf_fonts, pdf_render
+
 
 class TestSign(BaseCommon):
     @classmethod
@@ -143,6 +150,16 @@ class TestSign(BaseCommon):
         self.request.delete_item(str(item["id"]))
         self.assertFalse(self.request.get_info()["items"])
 
+    def test_request_items_indexed(self):
+        item = self.configure_request()
+        request_item = self.request.item_ids
+        self.assertEqual(request_item.item_key, item["id"])
+        self.assertEqual(request_item.role_id, self.role_customer)
+        self.assertEqual(request_item.field_type, item["field_type"])
+        self.assertEqual(self.request.signatory_data, {str(item["id"]): item})
+        self.request.signatory_data = {}
+        self.assertFalse(self.request.item_ids)
+
     def test_template_generate_without_model_partner_selection_policy_empty(self):
         """Template without model, role with empty partner type option."""
         self.configure_template()
@@ -173,6 +190,216 @@ class TestSign(BaseCommon):
         self.assertEqual(len(request.signer_ids), 1)
         self.assertIn(self.partner, request.signer_ids.mapped("partner_id"))
 
+    def test_auto_fill_batch_values(self):
+        department = self.env["hr.department"].create({"name": "Department"})
+        employees = self.env["hr.employee"].create(
+            [
+                {"name": "Employee 1", "department_id": department.id},
+                {"name": "Employee 2"},
+            ]
+        )
+        department.manager_id = employees[0]
+        for selection, records in [
+            ("hr.employee.name", employees),
+            ("hr.employee.department_id", employees),
+            ("hr.employee.name", department),
+            # The records themselves are partners, not partners of the role
+            ("hr.employee.name", employees.work_contact_id),
+            ("hr.employee.department_id", employees.work_contact_id | self.partner),
+        ]:
+            field = self.env["sign.oca.field"].create(
+                {
+                    "name": selection,
+                    "field_type": "auto_fill",
+                    "hr_field_selection": selection,
+                    "default_value": "-",
+                }
+            )
+            self.assertEqual(
+                field._extract_values_from_records(records, self.role_customer),
+                {
+                    record.id: field.extract_value_from_record(
+                        record,
+                        {
+                            "role_id": self.role_customer.id,
+                            "role_name": self.role_customer.name,
+                        },
+                    )
+                    for record in records
+                },
+            )
+
+    def test_render_pdf_items_single_merge_per_page(self):
+        reader = PdfFileReader(BytesIO(base64.b64decode(self.data)))
+        pages = {1: reader.getPage(0)}
+        items = [
+            {
+                "field_type": field_type,
+                "page": 1,
+                "position_x": 10,
+                "position_y": 10 * index,
+                "width": 10,
+                "height": 5,
+                "value": value,
+            }
+            for index, (field_type, value) in enumerate(
+                [("text", "My Name"), ("check", True), ("auto_fill", "Auto")]
+            )
+        ]
+        page_class = type(pages[1])
+        with patch.object(
+            page_class, "mergePage", autospec=True, side_effect=page_class.mergePage
+        ) as merge_page:
+            rendered = self.env["sign.oca.request.signer"]._render_pdf_items(
+                pages, items
+            )
+        self.assertEqual(len(rendered), 3)
+        self.assertEqual(merge_page.call_count, 1)
+
+    def test_paragraph_style_registry(self):
+        style = pdf_render.get_paragraph_style()
+        self.assertIs(pdf_render.get_paragraph_style(), style)
+        self.assertEqual(style.fontSize, 10)
+        self.assertEqual(style.leading, 12)
+        self.assertEqual(pdf_fonts.ensure_font("Unknown"), pdf_fonts.FALLBACK_FONT)
+        self.template.write({"font_family": "Courier", "font_size": 12})
+        self.request.template_id = self.template
+        request_style = self.request._get_paragraph_style()
+        self.assertEqual(request_style.fontName, "Courier")
+        self.assertEqual(request_style.fontSize, 12)
+        self.assertIs(self.request.signer_ids._getParagraphStyle(), request_style)
+
+    def test_signature_image_cache(self):
+        reader = PdfFileReader(BytesIO(base64.b64decode(self.data)))
+        page = reader.getPage(0)
+        image = base64.b64encode(
+            misc.file_open("sign_oca/static/description/icon.png", "rb").read()
+        ).decode()
+        item = {
+            "field_type": "signature",
+            "page": 1,
+            "position_x": 10,
+            "position_y": 10,
+            "width": 10,
+            "height": 5,
+            "value": "data:image/png;base64," + image,
+        }
+        with pdf_render.image_cache():
+            image_reader = pdf_render.get_image_reader(item["value"])
+            self.assertIs(pdf_render.get_image_reader(item["value"]), image_reader)
+            overlay, drawn_items = pdf_render.render_overlay([item], page.mediaBox)
+            self.assertTrue(overlay)
+            self.assertEqual(drawn_items, [item])
+        self.assertIsNot(pdf_render.get_image_reader(item["value"]), image_reader)
+
+    def test_signed_attachment_shared(self):
+        self.request.record_ref = f"{self.partner._name},{self.partner.id}"
+        attachment = self.request._create_signed_attachment()
+        self.assertEqual(self.request.signed_attachment_id, attachment)
+        self.assertEqual(attachment.res_model, "res.partner")
+        self.assertEqual(attachment.res_id, self.partner.id)
+        self.assertEqual(
+            attachment.store_fname, self.request._get_data_attachment().store_fname
+        )
+        self.assertTrue(self.request._check_signed_attachment(full=True))
+
+    def test_signer_inbox(self):
+        self.request.add_item(
+            {
+                "role_id": self.role_customer.id,
+                "field_id": self.env.ref("sign_oca.sign_field_name").id,
+                "page": 1,
+                "position_x": 10,
+                "position_y": 10,
+                "width": 10,
+                "height": 10,
+            }
+        )
+        signer = self.request.signer_ids
+        self.assertFalse(signer.is_current_turn)
+        # Nobody can sign a draft request
+        self.assertFalse(signer.with_context(portal_access=True).is_allow_signature)
+        self.request.with_context(sign_oca_render_sync=True).action_send()
+        self.assertTrue(signer.is_current_turn)
+        signer.invalidate_recordset(["is_allow_signature"])
+        self.assertTrue(signer.with_context(portal_access=True).is_allow_signature)
+        self.assertFalse(signer.signed)
+        signer_model = self.env["sign.oca.request.signer"]
+        self.assertEqual(signer_model._search_inbox(self.signer), signer)
+        # A contact signing for a company sees the document in both places
+        self.signer.is_company = True
+        contact = self.env["res.partner"].create(
+            {"name": "Signer contact", "parent_id": self.signer.id}
+        )
+        signer.partner_id = contact
+        contact_user = self.env["res.users"].create(
+            {
+                "name": "Signer contact",
+                "login": "sign_oca_signer_contact",
+                "partner_id": contact.id,
+                "groups_id": [(6, 0, [self.env.ref("base.group_user").id])],
+            }
+        )
+        self.assertEqual(
+            signer_model.with_user(contact_user).get_inbox()["total"], 1
+        )
+        self.assertEqual(
+            self.env["sign.oca.request"]
+            .with_user(contact_user)
+            .search([("to_sign", "=", True)]),
+            self.request,
+        )
+        self.assertFalse(signer_model._search_inbox(self.signer, limit=1, offset=1))
+        signer.signed_on = fields.Datetime.now()
+        self.request._check_signed()
+        self.assertTrue(signer.signed)
+        self.assertFalse(signer.is_current_turn)
+        self.assertEqual(self.request.signed_count, 1)
+        self.assertFalse(signer_model._search_inbox(self.signer))
+
+    def test_sign_request_user_count(self):
+        user = self.env["res.users"].create(
+            {
+                "name": "Signer user",
+                "login": "sign_oca_signer_user",
+                "partner_id": self.signer.id,
+                "groups_id": [(6, 0, [self.env.ref("base.group_user").id])],
+            }
+        )
+        users = self.env["res.users"].with_user(user)
+        self.assertFalse(users.sign_oca_request_user_count())
+        self.request.add_item(
+            {
+                "role_id": self.role_customer.id,
+                "field_id": self.env.ref("sign_oca.sign_field_name").id,
+                "page": 1,
+                "position_x": 10,
+                "position_y": 10,
+                "width": 10,
+                "height": 10,
+            }
+        )
+        self.request.with_context(sign_oca_render_sync=True).action_send()
+        counts = users.sign_oca_request_user_count()
+        self.assertEqual(len(counts), 1)
+        self.assertEqual(counts[0]["model"], "sign.oca.request")
+        self.assertEqual(counts[0]["total_records"], 1)
+        self.request.signer_ids.signed_on = fields.Datetime.now()
+        self.request._check_signed()
+        self.assertFalse(users.sign_oca_request_user_count())
+
+    def test_request_log_buffer(self):
+        logs = self.env["sign.oca.request.log"]
+        domain = [("request_id", "=", self.request.id), ("action", "=", "view")]
+        self.request.preview()
+        self.request.preview()
+        self.assertFalse(logs.search(domain))
+        self.env.cr.flush()
+        self.assertEqual(len(logs.search(domain)), 2)
+        logs.search(domain).write({"date": "2000-01-01 00:00:00"})
+        self.assertEqual(logs._cron_gc_view_logs(), 2)
+        self.assertFalse(logs.search(domain))
+
     def test_sign_request_role_with_default(self):
         request_form = Form(self.env["sign.oca.request"])
         with request_form.signer_ids.new() as signer:
@@ -186,6 +413,18 @@ class TestSign(BaseCommon):
             signer.role_id = self.role_child_partner
             self.assertEqual(signer.partner_id, self.partner)
 
+    def test_sign_role_partners_from_records(self):
+        records = self.partner_child | self.partner
+        self.assertEqual(
+            self.role_child_partner._get_partners_from_records(records),
+            {self.partner_child.id: self.partner.id, self.partner.id: False},
+        )
+        self.assertEqual(
+            self.role_supervisor._get_partners_from_records(records),
+            dict.fromkeys(records.ids, self.partner.id),
+        )
+        self.assertFalse(self.role_child_partner._get_partner_from_record(False))
+
     def test_template_generate_multi_partner(self):
         self.configure_template()
         model_res_partner = self.env.ref("base.model_res_partner")
@@ -208,6 +447,64 @@ class TestSign(BaseCommon):
         self.assertNotIn(self.partner_child, signer_partners)
         self.assertNotIn(partner_child_2, signer_partners)
 
+    def test_template_generate_multi_notifications(self):
+        self.configure_template()
+        self.template.model_id = self.env.ref("base.model_res_partner")
+        self.template.item_ids.role_id = self.role_child_partner
+        self.env["res.partner"].create(
+            {"name": "Child partner extra", "parent_id": self.partner.id}
+        )
+        self.env["ir.config_parameter"].sudo().set_param(
+            "sign_oca.notification_rate", 1
+        )
+        mails = self.env["mail.mail"].search([])
+        wizard_form = Form(
+            self.env["sign.oca.template.generate.multi"].with_context(
+                default_model="res.partner", active_ids=self.partner.child_ids.ids
+            )
+        )
+        wizard_form.template_id = self.template
+        action = wizard_form.save().generate()
+        requests = self.env[action["res_model"]].search(action["domain"])
+        mails = self.env["mail.mail"].search([("id", "not in", mails.ids)])
+        self.assertEqual(len(mails), 2)
+        self.assertEqual(mails.recipient_ids, self.partner)
+        self.assertEqual(set(mails.mapped("model")), {"sign.oca.request"})
+        self.assertEqual(set(mails.mapped("res_id")), set(requests.ids))
+        # One mail per minute
+        self.assertEqual(len(mails.filtered("scheduled_date")), 1)
+
+    def test_notify_inbox_user(self):
+        self.env["res.users"].create(
+            {
+                "name": "Signer user",
+                "login": "sign_oca_inbox_user",
+                "partner_id": self.signer.id,
+                "notification_type": "inbox",
+                "groups_id": [(6, 0, [self.env.ref("base.group_user").id])],
+            }
+        )
+        self.request.add_item(
+            {
+                "role_id": self.role_customer.id,
+                "field_id": self.env.ref("sign_oca.sign_field_name").id,
+                "page": 1,
+                "position_x": 10,
+                "position_y": 10,
+                "width": 10,
+                "height": 10,
+            }
+        )
+        self.assertFalse(self.request.signer_ids._notify())
+        notification = self.env["mail.notification"].search(
+            [
+                ("res_partner_id", "=", self.signer.id),
+                ("mail_message_id.model", "=", "sign.oca.request"),
+                ("mail_message_id.res_id", "=", self.request.id),
+            ]
+        )
+        self.assertEqual(notification.notification_type, "inbox")
+
     def test_auto_sign_template(self):
         self.configure_template()
         self.assertEqual(0, self.template.request_count)
@@ -232,6 +529,308 @@ class TestSign(BaseCommon):
         self.assertEqual(res["type"], "ir.actions.act_url")
         self.assertEqual(res["url"], signer.access_url)
 
+    def test_signing_sequence(self):
+        self.configure_template()
+        self.template.add_item(
+            {
+                "field_id": self.env.ref("sign_oca.sign_field_name").id,
+                "role_id": self.role_supervisor.id,
+                "page": 1,
+                "position_x": 10,
+                "position_y": 30,
+                "width": 10,
+                "height": 10,
+            }
+        )
+        f = Form(
+            self.env["sign.oca.template.generate"].with_context(
+                default_template_id=self.template.id
+            )
+        )
+        with f.signer_ids.edit(0) as signer:
+            signer.partner_id = self.env.user.partner_id
+        action = f.save().generate()
+        request = self.env[action["res_model"]].browse(action["res_id"])
+        first = request.signer_ids.filtered(lambda s: s.role_id == self.role_customer)
+        second = request.signer_ids - first
+        self.assertEqual(first.signing_sequence, 0)
+        self.assertEqual(second.signing_sequence, 1)
+        self.assertTrue(first.is_allow_signature)
+        with self.assertRaises(ValidationError):
+            second.action_sign({})
+
+    def test_sign_appends_incremental_update(self):
+        self.configure_template()
+        f = Form(
+            self.env["sign.oca.template.generate"].with_context(
+                default_template_id=self.template.id, default_sign_now=True
+            )
+        )
+        f.save().generate()
+        signer = self.template.request_ids.signer_id
+        unsigned_data = base64.b64decode(signer.request_id.data)
+        data = {}
+        for key in signer.get_info()["items"]:
+            val = signer.get_info()["items"][key].copy()
+            val["value"] = "My Name"
+            data[key] = val
+        signer.action_sign(data)
+        signed_data = base64.b64decode(signer.request_id.data)
+        self.assertTrue(signed_data.startswith(unsigned_data))
+        self.assertEqual(signer.signed_data_size, len(signed_data))
+        self.assertTrue(signer._check_signed_revision())
+        signer.signature_hash = signer.signature_hash + "AA"
+        self.assertFalse(signer._check_signed_revision())
+
+    def test_sign_async_rendering(self):
+        self.configure_template()
+        self.env.company.sign_oca_async_rendering = True
+        f = Form(
+            self.env["sign.oca.template.generate"].with_context(
+                default_template_id=self.template.id, default_sign_now=True
+            )
+        )
+        f.save().generate()
+        signer = self.template.request_ids.signer_id
+        job_model = self.env["sign.oca.render.job"]
+        job_model._cron_process_jobs()
+        unsigned_data = signer.request_id.data
+        data = {}
+        for key in signer.get_info()["items"]:
+            val = signer.get_info()["items"][key].copy()
+            val["value"] = "My Name"
+            data[key] = val
+        res = signer.action_sign(data)
+        self.assertTrue(res["pending"])
+        self.assertTrue(signer.signed_on)
+        self.assertEqual(signer.request_id.data, unsigned_data)
+        self.assertEqual(signer._get_render_status()["state"], "pending")
+        job_model._cron_process_jobs()
+        self.assertEqual(signer._get_render_status()["state"], "done")
+        self.assertEqual(signer.request_id.state, "signed")
+        self.assertNotEqual(signer.request_id.data, unsigned_data)
+        self.assertTrue(signer._check_signed_revision())
+
+    def test_render_jobs_blocked_request(self):
+        job_model = self.env["sign.oca.render.job"]
+        other_request = self.request.copy()
+        failed = job_model.create(
+            {"request_id": self.request.id, "job_type": "send", "state": "failed"}
+        )
+        blocked = job_model.create(
+            [{"request_id": self.request.id, "job_type": "send"}] * 2
+        )
+        runnable = job_model.create(
+            {"request_id": other_request.id, "job_type": "send"}
+        )
+        self.assertEqual(job_model._get_runnable_jobs(2), runnable)
+        failed.action_retry()
+        self.assertEqual(job_model._get_runnable_jobs(2), failed | runnable)
+        self.assertNotIn(blocked[0], job_model._get_runnable_jobs(10))
+
+    def test_bulk_sign(self):
+        self.template.add_item(
+            {
+                "field_id": self.env.ref("sign_oca.sign_field_name").id,
+                "page": 1,
+                "position_x": 10,
+                "position_y": 10,
+                "width": 10,
+                "height": 10,
+            }
+        )
+        signers = self.env["sign.oca.request.signer"]
+        for _i in range(3):
+            f = Form(
+                self.env["sign.oca.template.generate"].with_context(
+                    default_template_id=self.template.id, default_sign_now=True
+                )
+            )
+            f.save().generate()
+            signers |= self.template.request_ids.signer_ids - signers
+        self.env["ir.config_parameter"].set_param("sign_oca.bulk_sign_workers", 1)
+        self.env["ir.config_parameter"].set_param("sign_oca.bulk_sign_chunk_size", 2)
+        wizard = (
+            self.env["sign.oca.bulk.sign.wizard"]
+            .with_context(active_ids=signers.ids)
+            .create({"signature_image": "data:image/png;base64,AAAA"})
+        )
+        res = wizard.action_bulk_sign()
+        self.assertEqual(res["params"]["type"], "success")
+        self.assertEqual(set(signers.request_id.mapped("state")), {"signed"})
+        for signer in signers:
+            self.assertTrue(signer._check_signed_revision())
+
+    def test_render_auto_fill_fields_batch(self):
+        item = {
+            "field_type": "auto_fill",
+            "role_id": self.role_customer.id,
+            "page": 1,
+            "position_x": 10,
+            "position_y": 10,
+            "width": 20,
+            "height": 5,
+            "value": "Auto",
+        }
+        requests = self.env["sign.oca.request"].create(
+            [
+                {
+                    "name": f"Request {index}",
+                    "template_id": self.template.id,
+                    "signatory_data": {1: dict(item, id=1)},
+                }
+                for index in range(2)
+            ]
+        )
+        requests._render_auto_fill_fields_batch()
+        template_data = base64.b64decode(self.template.data)
+        for request in requests:
+            data = base64.b64decode(request.data)
+            self.assertTrue(data.startswith(template_data))
+            self.assertNotEqual(data, template_data)
+            self.assertTrue(request.item_ids.item_data["alreadyMerged"])
+
+    def test_template_page_geometry(self):
+        reader = PdfFileReader(BytesIO(base64.b64decode(self.data)))
+        box = reader.getPage(0).mediaBox
+        self.assertEqual(self.template.page_count, reader.numPages)
+        page = self.template.page_ids[0]
+        self.assertEqual(page.page, 1)
+        self.assertAlmostEqual(page.width, float(box.getWidth()))
+        self.assertAlmostEqual(page.height, float(box.getHeight()))
+        self.assertEqual(self.template.get_info()["pages"][0]["page"], 1)
+        request = self.env["sign.oca.request"].create(
+            {"name": "Request", "template_id": self.template.id}
+        )
+        self.assertEqual(
+            pdf_render.get_page_boxes(request.page_geometry)[1].getWidth(),
+            page.width,
+        )
+        with self.assertRaises(ValidationError):
+            self.template.add_item(
+                {
+                    "field_id": self.env.ref("sign_oca.sign_field_name").id,
+                    "page": reader.numPages + 1,
+                    "position_x": 10,
+                    "position_y": 10,
+                    "width": 10,
+                    "height": 10,
+                }
+            )
+
+    def test_request_page_manifest(self):
+        item = self.request.add_item(
+            {
+                "role_id": self.role_customer.id,
+                "field_id": self.env.ref("sign_oca.sign_field_name").id,
+                "page": 1,
+                "position_x": 10,
+                "position_y": 10,
+                "width": 10,
+                "height": 10,
+            }
+        )
+        signer = self.request.signer_ids
+        manifest = signer._get_page_manifest(signer.access_token)
+        self.assertEqual(manifest["page_count"], 1)
+        self.assertEqual(manifest["content_hash"], self.request._get_content_hash())
+        self.assertTrue(manifest["pages"][0]["has_fields"])
+        self.assertTrue(manifest["pages"][0]["to_sign"])
+        self.assertEqual(item["page"], manifest["pages"][0]["page"])
+        page_model = self.env["sign.oca.request.page"]
+        page = page_model._get_page(self.request, 1)
+        self.assertEqual(page_model._get_page(self.request, 1), page)
+        reader = PdfFileReader(BytesIO(base64.b64decode(page.data)))
+        self.assertEqual(reader.numPages, 1)
+        self.request.write({"data": page.data})
+        self.assertNotEqual(page_model._get_page(self.request, 1), page)
+        self.assertFalse(page.exists())
+
+    def test_reader_cache(self):
+        cache = pdf_cache.ReaderCache(max_entries=1)
+        data = base64.b64decode(self.data)
+        with cache.document("a", lambda: data) as (cached_data, reader):
+            self.assertEqual(reader.numPages, 1)
+        with cache.document("a", lambda: data) as (_data, cached_reader):
+            self.assertIs(cached_reader, reader)
+        with cache.document("b", lambda: data):
+            pass
+        self.assertEqual(
+            cache.get_stats(),
+            {
+                "hits": 1,
+                "misses": 2,
+                "evictions": 1,
+                "entries": 1,
+                "size": len(data),
+            },
+        )
+        cache.invalidate("b")
+        self.assertEqual(cache.get_stats()["entries"], 0)
+        content_hash = self.request._get_content_hash()
+        with self.request._get_document() as (cached_data, _reader):
+            self.assertEqual(cached_data, data)
+        self.assertIn(content_hash, pdf_cache.reader_cache._entries)
+        self.request.write({"data": self.template.data})
+        self.assertNotIn(content_hash, pdf_cache.reader_cache._entries)
+
+    def test_template_request_shares_template_document(self):
+        self.configure_template()
+        f = Form(
+            self.env["sign.oca.template.generate"].with_context(
+                default_template_id=self.template.id, default_sign_now=True
+            )
+        )
+        f.save().generate()
+        request = self.template.request_ids
+        self.assertEqual(request.data, self.template.data)
+        self.assertEqual(
+            request._get_data_attachment().store_fname,
+            self.template._get_data_attachment().store_fname,
+        )
+        report = self.env["sign.oca.request"]._get_data_storage_report(
+            self.template.ids
+        )
+        self.assertEqual(report["request_count"], 1)
+        self.assertEqual(report["shared_count"], 1)
+        self.assertEqual(report["stored_size"], 0)
+
+    def test_primary_attachment_shared(self):
+        self.template.write(
+            {
+                "primary_attachment": self.data,
+                "primary_attachment_filename": "authorization.pdf",
+            }
+        )
+        requests = self.env["sign.oca.request"].create(
+            [
+                {"name": f"Request {index}", "template_id": self.template.id}
+                for index in range(2)
+            ]
+        )
+        template_attachment = self.template._get_primary_attachment()
+        for request in requests:
+            self.assertEqual(
+                request.primary_attachment, self.template.primary_attachment
+            )
+            self.assertEqual(
+                request._get_primary_attachment().store_fname,
+                template_attachment.store_fname,
+            )
+        notification_attachment = requests[0]._get_notification_attachment()
+        self.assertEqual(notification_attachment.res_model, "mail.compose.message")
+        self.assertEqual(
+            requests[1]._get_notification_attachment(), notification_attachment
+        )
+        self.assertEqual(notification_attachment.raw, base64.b64decode(self.data))
+        self.env.cr.execute(
+            "UPDATE ir_attachment SET create_date = create_date - interval '2 days' "
+            "WHERE id = %s",
+            (notification_attachment.id,),
+        )
+        self.env["ir.attachment"]._sign_oca_gc_compose_attachments()
+        self.assertFalse(notification_attachment.exists())
+
     def test_auto_sign_template_cancel(self):
         self.configure_template()
         self.assertEqual(0, self.template.request_count)
@@ -282,3 +881,75 @@ class TestSign(BaseCommon):
         signer.inalterable_hash = signer._get_new_hash(signer.secure_sequence_number)
         signer_2.invalidate_recordset()
         self.assertTrue(signer_2.altered_hash)
+        audit = self.env["sign.oca.chain.audit"]._run_audit()
+        self.assertEqual(audit.state, "altered")
+        self.assertIn(signer_2, audit.line_ids.signer_id)
+        self.assertNotIn(signer, audit.line_ids.signer_id)
+
+    def test_inalterability_async(self):
+        self.env.company.sign_oca_async_hash_chain = True
+        self.configure_template()
+        signers = self.env["sign.oca.request.signer"]
+        for _index in range(2):
+            Form(
+                self.env["sign.oca.template.generate"].with_context(
+                    default_template_id=self.template.id, default_sign_now=True
+                )
+            ).save().generate()
+            signer = self.template.request_ids.signer_id - signers
+            data = {}
+            for key, item in signer.get_info()["items"].items():
+                data[key] = dict(item, value="My Name")
+            signer.action_sign(data)
+            self.assertEqual(signer.hash_state, "pending")
+            self.assertFalse(signer.inalterable_hash)
+            signers |= signer
+        self.env["sign.oca.request.signer"]._cron_chain_hashes()
+        self.assertEqual(set(signers.mapped("hash_state")), {"chained"})
+        self.assertEqual(
+            signers[1].secure_sequence_number, signers[0].secure_sequence_number + 1
+        )
+        for signer in signers:
+            self.assertFalse(signer.altered_hash)
+
+    def test_signing_metrics(self):
+        self.configure_template()
+        Form(
+            self.env["sign.oca.template.generate"].with_context(
+                default_template_id=self.template.id, default_sign_now=True
+            )
+        ).save().generate()
+        signer = self.template.request_ids.signer_ids
+        data = {}
+        for key, item in signer.get_info()["items"].items():
+            data[key] = dict(item, value="My Name")
+        signer.action_sign(data)
+        metric = self.env["sign.oca.metric"].search(
+            [("request_id", "=", signer.request_id.id)]
+        )
+        self.assertEqual(len(metric), 1)
+        self.assertEqual(metric.template_id, self.template)
+        self.assertIn("render", metric.span_data)
+        self.assertIn("merge", metric.span_data)
+        stats = self.env["sign.oca.metric"].get_latency_stats()
+        template_stats = [
+            line
+            for line in stats["templates"]
+            if line["template_id"] == self.template.id
+        ]
+        self.assertEqual(template_stats[0]["count"], 1)
+        self.assertLessEqual(template_stats[0]["p50"], template_stats[0]["p95"])
+        self.assertIn("hits", stats["reader_cache"])
+
+    def test_signing_metrics_disabled(self):
+        metric_model = self.env["sign.oca.metric"]
+        self.assertTrue(metric_model._is_enabled())
+        settings = self.env["res.config.settings"].create(
+            {"sign_oca_collect_metrics": False}
+        )
+        settings.execute()
+        self.assertFalse(metric_model._is_enabled())
+        self.assertFalse(
+            self.env["res.config.settings"].create({}).sign_oca_collect_metrics
+        )
+        self.assertFalse(metric_model._record(self.request, None))
@@ -0,0 +1,152 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+
+import base64
+import logging
+import time
+from io import BytesIO
+
+from PyPDF2 import PdfFileReader
+from reportlab.pdfgen import canvas
+
+from odoo.tests import tagged
+
+from odoo.addons.base.tests.common import BaseCommon
+
+from ..tools import pdf_cache
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("-standard", "sign_oca_benchmark")
+class TestSignBenchmark(BaseCommon):
+    """Rendering latency benchmarks.
+
+    They are not part of the standard test run, launch them with
+    ``--test-tags sign_oca_benchmark`` and read the results in the log.
+    """
+
+    page_count = 12
+    field_counts = (1, 10, 40, 80)
+    rounds = 3
+    send_count = 1000
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.pdf = cls._make_pdf(cls.page_count)
+        cls.signer_model = cls.env["sign.oca.request.signer"]
+
+    @classmethod
+    def _make_pdf(cls, page_count):
+        stream = BytesIO()
+        can = canvas.Canvas(stream)
+        for page in range(page_count):
+            can.drawString(100, 750, f"Page {page + 1}")
+            can.showPage()
+        can.save()
+        return stream.getvalue()
+
+    def _make_items(self, count):
+        items = []
+        for index in range(count):
+            field_type = ("text", "check", "auto_fill")[index % 3]
+            items.append(
+                {
+                    "id": index + 1,
+                    "field_type": field_type,
+                    "name": f"Field {index + 1}",
+                    "required": False,
+                    "page": index % self.page_count + 1,
+                    "position_x": 10,
+                    "position_y": 5 + (index // self.page_count) * 10 % 90,
+                    "width": 30,
+                    "height": 5,
+                    "value": f"Value {index + 1}",
+                }
+            )
+        return items
+
+    def _get_pages(self):
+        reader = PdfFileReader(BytesIO(self.pdf))
+        return {
+            number: reader.getPage(number - 1)
+            for number in range(1, reader.numPages + 1)
+        }
+
+    def _render_per_field(self, items):
+        pages = self._get_pages()
+        for item in items:
+            page = pages[item["page"]]
+            new_page = self.signer_model._get_pdf_page(item, page.mediaBox)
+            if new_page:
+                page.mergePage(new_page)
+        return pages
+
+    def _render_per_page(self, items):
+        pages = self._get_pages()
+        self.signer_model._render_pdf_items(pages, items)
+        return pages
+
+    def _measure(self, method, *args):
+        timings = []
+        for _round in range(self.rounds):
+            start = time.perf_counter()
+            method(*args)
+            timings.append(time.perf_counter() - start)
+        return min(timings) * 1000
+
+    def test_overlay_latency_by_field_count(self):
+        _logger.info("Overlay rendering on a %s pages document", self.page_count)
+        for count in self.field_counts:
+            items = self._make_items(count)
+            per_field = self._measure(self._render_per_field, items)
+            per_page = self._measure(self._render_per_page, items)
+            _logger.info(
+                "%3s fields: one overlay per field %8.1f ms, "
+                "one overlay per page %8.1f ms (x%.1f)",
+                count,
+                per_field,
+                per_page,
+                per_field / per_page,
+            )
+
+    def _create_sent_requests(self, template, items, count):
+        return self.env["sign.oca.request"].create(
+            [
+                {
+                    "name": f"Request {index}",
+                    "template_id": template.id,
+                    "signatory_data": dict(enumerate(items, start=1)),
+                }
+                for index in range(count)
+            ]
+        )
+
+    def test_send_auto_fill_latency(self):
+        template = self.env["sign.oca.template"].create(
+            {"name": "Benchmark", "data": base64.b64encode(self.pdf)}
+        )
+        items = [
+            dict(item, field_type="auto_fill") for item in self._make_items(10)
+        ]
+        one_by_one = self._create_sent_requests(template, items, self.send_count)
+        batch = self._create_sent_requests(template, items, self.send_count)
+
+        # Every request parses its document, as before the reader cache
+        start = time.perf_counter()
+        for request in one_by_one:
+            pdf_cache.reader_cache.clear()
+            request._render_auto_fill_fields()
+        one_by_one_time = time.perf_counter() - start
+        pdf_cache.reader_cache.clear()
+        start = time.perf_counter()
+        batch._render_auto_fill_fields_batch()
+        batch_time = time.perf_counter() - start
+        _logger.info(
+            "Auto fill of %s requests: one by one %8.1f s, batch %8.1f s (x%.1f)",
+            self.send_count,
+            one_by_one_time,
+            batch_time,
+            one_by_one_time / batch_time,
+        )
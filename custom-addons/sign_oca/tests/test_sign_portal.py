@@ -78,3 +78,22 @@ class TestSignPortal(HttpCase):
             val = self.request.signer_ids.get_info()["items"][key].copy()
             val["value"] = "My Name"
             data[key] = val
+
+    def test_portal_content_cache(self):
+        self.authenticate("portal", "portal")
+        signer = self.request.signer_ids
+        url = f"/sign_oca/content/{signer.id}/{signer.access_token}"
+        response = self.url_open(url)
+        response.raise_for_status()
+        etag = response.headers["ETag"]
+        self.assertIn(self.request._get_data_stream().etag, etag)
+        self.assertEqual(
+            self.url_open(url, headers={"If-None-Match": etag}).status_code, 304
+        )
+        partial = self.url_open(url, headers={"Range": "bytes=0-9"})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.content, base64.b64decode(self.data)[:10])
+        versioned = self.url_open(f"{url}?hash={self.request._get_data_stream().etag}")
+        self.assertIn("immutable", versioned.headers["Cache-Control"])
+        self.assertIn("private", versioned.headers["Cache-Control"])
+        self.assertNotIn("public", versioned.headers["Cache-Control"])
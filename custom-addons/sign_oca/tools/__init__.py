@@ -0,0 +1 @@
+from . import pdf_render
@@ -0,0 +1,86 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Timing of the steps of the signing pipeline.
+
+A :func:`span` measures the wall time of a step and, given a cursor, the
+number of SQL queries it ran. Spans are added to the collector opened by
+:func:`collect` in the current thread, if any, and are logged only when the
+debug level of this logger is enabled; otherwise a span costs nothing.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+_logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class Collector:
+    __slots__ = ("cr", "start", "queries", "spans")
+
+    def __init__(self, cr=None):
+        self.cr = cr
+        self.start = time.perf_counter()
+        self.queries = _query_count(cr)
+        self.spans = {}
+
+    def add(self, name, duration, queries):
+        total = self.spans.setdefault(name, [0.0, 0])
+        total[0] += duration
+        total[1] += queries
+
+    @property
+    def duration(self):
+        """Milliseconds since the collector was opened."""
+        return (time.perf_counter() - self.start) * 1000
+
+    @property
+    def query_count(self):
+        return _query_count(self.cr) - self.queries
+
+    def get_spans(self):
+        return {
+            name: {"duration": round(duration, 3), "queries": queries}
+            for name, (duration, queries) in self.spans.items()
+        }
+
+
+def _query_count(cr):
+    return getattr(cr, "sql_log_count", 0) if cr is not None else 0
+
+
+@contextmanager
+def collect(cr=None):
+    """Yield a :class:`Collector` gathering the spans run inside the block."""
+    previous = getattr(_local, "collector", None)
+    collector = _local.collector = Collector(cr)
+    try:
+        yield collector
+    finally:
+        _local.collector = previous
+
+
+@contextmanager
+def span(name, cr=None, **tags):
+    """Measure the step ``name``, durations are in milliseconds."""
+    collector = getattr(_local, "collector", None)
+    if collector is None and not _logger.isEnabledFor(logging.DEBUG):
+        yield
+        return
+    cr = cr if cr is not None else getattr(collector, "cr", None)
+    queries = _query_count(cr)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = (time.perf_counter() - start) * 1000
+        queries = _query_count(cr) - queries
+        if collector is not None:
+            collector.add(name, duration, queries)
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(
+                "%s took %.3f ms, %s queries %s", name, duration, queries, tags
+            )
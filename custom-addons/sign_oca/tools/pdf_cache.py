@@ -0,0 +1,111 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Parsed documents shared by the requests of a worker.
+
+Opening, previewing and signing a request parse the same bytes several times
+within seconds. The decoded bytes and their ``PdfFileReader`` are kept in a
+bounded LRU keyed by the hash of the document, so a version is parsed once.
+
+Readers are not thread safe and resolve their objects lazily, so an entry is
+locked while it is used. They must only be read: code merging pages or
+adding them to a writer has to parse its own copy.
+"""
+
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from io import BytesIO
+
+from PyPDF2 import PdfFileReader
+
+from .instrumentation import span
+
+MAX_ENTRIES = 16
+MAX_BYTES = 64 * 1024 * 1024
+
+
+class _Entry:
+    __slots__ = ("data", "reader", "lock")
+
+    def __init__(self, data):
+        self.data = data
+        self.reader = PdfFileReader(BytesIO(data))
+        self.lock = threading.RLock()
+
+
+class ReaderCache:
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_entry(self, key, load):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        # Loaded outside of the lock, other documents are still served
+        entry = self._load(load)
+        if len(entry.data) > self.max_bytes:
+            return entry
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = entry
+                self._size += len(entry.data)
+                self._evict()
+            return self._entries[key]
+
+    def _load(self, load):
+        with span("decode"):
+            return _Entry(load())
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._size > self.max_bytes
+        ):
+            _key, entry = self._entries.popitem(last=False)
+            self._size -= len(entry.data)
+            self.evictions += 1
+
+    @contextmanager
+    def document(self, key, load):
+        """Yield ``(data, reader)`` of the document ``key``.
+
+        ``load`` returns the bytes of the document when it is not cached.
+        Without a ``key`` the document is parsed and not cached.
+        """
+        entry = self._get_entry(key, load) if key else self._load(load)
+        with entry.lock:
+            yield entry.data, entry.reader
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= len(entry.data)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size": self._size,
+            }
+
+
+reader_cache = ReaderCache()
@@ -0,0 +1,104 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Fonts and paragraph styles of the sign renderer.
+
+TrueType fonts are registered in reportlab the first time a style needs
+them, instead of when the module is imported, and the styles are shared by
+all the fields using the same font and size.
+"""
+
+import functools
+import logging
+import threading
+
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+
+from odoo.tools.misc import file_path
+
+_logger = logging.getLogger(__name__)
+
+DEFAULT_FONT = "DejaVuSans"
+DEFAULT_FONT_SIZE = 10
+FALLBACK_FONT = "Helvetica"
+
+# Font families shipped as TrueType files, by style
+TTF_FAMILIES = {
+    "DejaVuSans": {
+        "normal": ("DejaVuSans", "DejaVuSans.ttf"),
+        "bold": ("DejaVuSans-Bold", "DejaVuSans-Bold.ttf"),
+        "italic": ("DejaVuSans-Oblique", "DejaVuSans-Oblique.ttf"),
+        "boldItalic": ("DejaVuSans-BoldOblique", "DejaVuSans-BoldOblique.ttf"),
+    },
+}
+# Standard PDF fonts, always available but without Vietnamese glyphs
+STANDARD_FONTS = ["Helvetica", "Times-Roman", "Courier"]
+
+_lock = threading.Lock()
+_resolved = {}
+
+
+def get_font_selection():
+    return [(font, font) for font in list(TTF_FAMILIES) + STANDARD_FONTS]
+
+
+def _find_font_file(filename):
+    """Return the path of ``filename``, the copy of the module first."""
+    try:
+        return file_path(f"sign_oca/data/{filename}")
+    except FileNotFoundError:
+        # reportlab looks for it in its TTFSearchPath (system fonts)
+        return filename
+
+
+def _register_family(family, styles):
+    for name, filename in styles.values():
+        pdfmetrics.registerFont(TTFont(name, _find_font_file(filename)))
+    pdfmetrics.registerFontFamily(
+        family, **{style: name for style, (name, _filename) in styles.items()}
+    )
+
+
+def ensure_font(family):
+    """Register ``family`` if needed and return the font name to use.
+
+    Unknown fonts and fonts whose files cannot be found fall back to
+    :data:`FALLBACK_FONT`.
+    """
+    if family in _resolved:
+        return _resolved[family]
+    with _lock:
+        if family not in _resolved:
+            font = family
+            if family in TTF_FAMILIES:
+                try:
+                    _register_family(family, TTF_FAMILIES[family])
+                except Exception as e:
+                    _logger.warning(
+                        "Font %s not available, using %s: %s",
+                        family,
+                        FALLBACK_FONT,
+                        e,
+                    )
+                    font = FALLBACK_FONT
+            elif family not in STANDARD_FONTS:
+                font = FALLBACK_FONT
+            _resolved[family] = font
+    return _resolved[family]
+
+
+@functools.lru_cache(maxsize=64)
+def get_paragraph_style(font=DEFAULT_FONT, size=DEFAULT_FONT_SIZE):
+    """Return the shared style for ``font`` and ``size``.
+
+    The returned style must not be modified.
+    """
+    return ParagraphStyle(
+        name=f"Oca Sign Style {font} {size}",
+        fontName=ensure_font(font),
+        fontSize=size,
+        leading=size * 1.2,
+        textColor=colors.black,
+    )
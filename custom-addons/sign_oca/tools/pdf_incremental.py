@@ -0,0 +1,275 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Incremental (append-only) updates of PDF documents.
+
+Instead of rewriting the whole document, the overlays are appended after
+the existing bytes together with a new cross-reference section whose
+``/Prev`` points to the previous one (PDF 32000-1, 7.5.6). The previous
+revision is therefore always a byte prefix of the new one.
+
+Each overlay page is stored as a form XObject and painted on top of the
+original content, which is isolated in a ``q``/``Q`` pair the same way
+``PageObject.mergePage`` does it.
+"""
+
+import logging
+import re
+import zlib
+from io import BytesIO
+
+from PyPDF2 import PdfFileReader, PdfFileWriter
+from PyPDF2.generic import (
+    ArrayObject,
+    DictionaryObject,
+    FloatObject,
+    IndirectObject,
+    NameObject,
+    NumberObject,
+    StreamObject,
+)
+
+_logger = logging.getLogger(__name__)
+
+STARTXREF_RE = re.compile(rb"startxref\s+(\d+)\s+%%EOF\s*$")
+FORM_NAME = "/SignOca%s"
+
+
+class IncrementalUpdateError(Exception):
+    """The document cannot be updated incrementally."""
+
+
+def get_startxref(data):
+    """Return the offset of the last cross-reference section of ``data``."""
+    match = STARTXREF_RE.search(data[-1024:])
+    if not match:
+        raise IncrementalUpdateError("No startxref found at the end of the file")
+    return int(match.group(1))
+
+
+def _serialize(obj):
+    stream = BytesIO()
+    obj.writeToStream(stream, None)
+    return stream.getvalue()
+
+
+def _get_stream_raw_data(stream_obj):
+    """Return the (still encoded) data of a stream object."""
+    return stream_obj._data
+
+
+class IncrementalWriter:
+    """Collect the objects of an update and append them to ``data``."""
+
+    def __init__(self, data, reader=None):
+        self.data = data
+        self.reader = reader or PdfFileReader(BytesIO(data))
+        if self.reader.isEncrypted:
+            raise IncrementalUpdateError("Encrypted documents are not supported")
+        self.prev_xref = get_startxref(data)
+        if data[self.prev_xref : self.prev_xref + 4] != b"xref":
+            # Cross-reference streams would need an xref stream update too
+            raise IncrementalUpdateError("Only cross-reference tables are supported")
+        self.next_id = int(self.reader.trailer["/Size"])
+        self.objects = {}
+        self.cloned = {}
+
+    def _add_object(self, body, idnum=None, generation=0):
+        if idnum is None:
+            idnum = self.next_id
+            self.next_id += 1
+        self.objects[idnum] = (generation, body)
+        return IndirectObject(idnum, generation, None)
+
+    def _reserve(self):
+        idnum = self.next_id
+        self.next_id += 1
+        return idnum
+
+    def _stream_body(self, dictionary, raw_data):
+        dictionary[NameObject("/Length")] = NumberObject(len(raw_data))
+        return b"%s\nstream\n%s\nendstream" % (_serialize(dictionary), raw_data)
+
+    def _clone(self, obj):
+        """Copy ``obj`` from a foreign document, renumbering its references."""
+        if isinstance(obj, IndirectObject):
+            key = (id(obj.pdf), obj.idnum, obj.generation)
+            if key not in self.cloned:
+                idnum = self._reserve()
+                self.cloned[key] = IndirectObject(idnum, 0, None)
+                value = obj.getObject()
+                if isinstance(value, StreamObject):
+                    body = self._stream_body(
+                        self._clone_dict(value), _get_stream_raw_data(value)
+                    )
+                else:
+                    body = _serialize(self._clone(value))
+                self._add_object(body, idnum)
+            return self.cloned[key]
+        if isinstance(obj, StreamObject):
+            raise IncrementalUpdateError("Direct stream objects are not allowed")
+        if isinstance(obj, DictionaryObject):
+            return self._clone_dict(obj)
+        if isinstance(obj, ArrayObject):
+            return ArrayObject([self._clone(value) for value in obj])
+        return obj
+
+    def _clone_dict(self, obj):
+        result = DictionaryObject()
+        for key, value in obj.items():
+            if key == "/Length":
+                continue
+            result[NameObject(key)] = self._clone(value)
+        return result
+
+    def _add_form(self, overlay):
+        """Store the overlay page as a form XObject and return its reference."""
+        contents = overlay["/Contents"].getObject()
+        if isinstance(contents, ArrayObject):
+            form = DictionaryObject()
+            form[NameObject("/Filter")] = NameObject("/FlateDecode")
+            raw_data = zlib.compress(
+                b"\n".join(part.getObject().getData() for part in contents)
+            )
+        else:
+            form = self._clone_dict(contents)
+            raw_data = _get_stream_raw_data(contents)
+        box = overlay.mediaBox
+        form.update(
+            {
+                NameObject("/Type"): NameObject("/XObject"),
+                NameObject("/Subtype"): NameObject("/Form"),
+                NameObject("/BBox"): ArrayObject(
+                    [
+                        NumberObject(0),
+                        NumberObject(0),
+                        FloatObject(box.getWidth()),
+                        FloatObject(box.getHeight()),
+                    ]
+                ),
+                NameObject("/Resources"): self._clone(
+                    overlay.get("/Resources", DictionaryObject())
+                ),
+            }
+        )
+        idnum = self._reserve()
+        return self._add_object(self._stream_body(form, raw_data), idnum)
+
+    def _add_content(self, content):
+        return self._add_object(
+            self._stream_body(DictionaryObject(), content)
+        )
+
+    def add_overlays(self, page_index, overlays):
+        """Paint ``overlays`` (a list of pages) over page ``page_index``."""
+        page = self.reader.getPage(page_index)
+        page_ref = page.indirectRef
+        if page_ref is None:
+            raise IncrementalUpdateError("Page %s has no reference" % page_index)
+        forms = [self._add_form(overlay) for overlay in overlays]
+
+        resources = DictionaryObject()
+        for key, value in page.get("/Resources", DictionaryObject()).getObject().items():
+            resources[NameObject(key)] = value
+        xobjects = DictionaryObject()
+        for key, value in resources.get("/XObject", DictionaryObject()).getObject().items():
+            xobjects[NameObject(key)] = value
+        paint = [b"Q"]
+        for form in forms:
+            name = FORM_NAME % form.idnum
+            xobjects[NameObject(name)] = form
+            paint.append(b"q %s Do Q" % name.encode())
+        resources[NameObject("/XObject")] = xobjects
+
+        contents = page.get("/Contents")
+        if contents is None:
+            contents = ArrayObject()
+        elif isinstance(contents.getObject(), ArrayObject):
+            contents = ArrayObject(contents.getObject())
+        else:
+            contents = ArrayObject([contents])
+        contents.insert(0, self._add_content(b"q"))
+        contents.append(self._add_content(b"\n".join(paint)))
+
+        new_page = DictionaryObject()
+        for key, value in page.items():
+            new_page[NameObject(key)] = value
+        new_page[NameObject("/Resources")] = resources
+        new_page[NameObject("/Contents")] = contents
+        self._add_object(_serialize(new_page), page_ref.idnum, page_ref.generation)
+
+    def write(self):
+        """Return the updated document."""
+        output = BytesIO()
+        output.write(self.data)
+        if not self.data.endswith(b"\n"):
+            output.write(b"\n")
+        offsets = {}
+        for idnum in sorted(self.objects):
+            generation, body = self.objects[idnum]
+            offsets[idnum] = (output.tell(), generation)
+            output.write(b"%d %d obj\n%s\nendobj\n" % (idnum, generation, body))
+
+        xref_offset = output.tell()
+        output.write(b"xref\n")
+        idnums = sorted(offsets)
+        start = 0
+        while start < len(idnums):
+            end = start
+            while end + 1 < len(idnums) and idnums[end + 1] == idnums[end] + 1:
+                end += 1
+            output.write(b"%d %d\n" % (idnums[start], end - start + 1))
+            for idnum in idnums[start : end + 1]:
+                output.write(b"%010d %05d n \n" % offsets[idnum])
+            start = end + 1
+
+        trailer = DictionaryObject()
+        for key in ("/Root", "/Info", "/ID"):
+            if key in self.reader.trailer:
+                trailer[NameObject(key)] = self.reader.trailer.raw_get(key)
+        trailer[NameObject("/Size")] = NumberObject(self.next_id)
+        trailer[NameObject("/Prev")] = NumberObject(self.prev_xref)
+        output.write(b"trailer\n%s\n" % _serialize(trailer))
+        output.write(b"startxref\n%d\n%%%%EOF\n" % xref_offset)
+        return output.getvalue()
+
+
+def append_overlays(data, overlays, reader=None):
+    """Return ``data`` with ``overlays`` appended as an incremental update.
+
+    ``overlays`` maps 0-based page indexes to the list of overlay pages to
+    paint over them. Raises :class:`IncrementalUpdateError` when the
+    document cannot be updated this way, so the caller can rewrite it.
+    """
+    writer = IncrementalWriter(data, reader=reader)
+    for page_index, page_overlays in sorted(overlays.items()):
+        writer.add_overlays(page_index, page_overlays)
+    return writer.write()
+
+
+def write_overlays(data, reader, overlays):
+    """Return ``data`` with ``overlays`` painted over its pages.
+
+    ``overlays`` is keyed by 1-based page numbers. The update is appended
+    when possible, otherwise the whole document is rewritten.
+    """
+    if not overlays:
+        return data
+    try:
+        return append_overlays(
+            data,
+            {number - 1: value for number, value in overlays.items()},
+            reader=reader,
+        )
+    except IncrementalUpdateError as e:
+        _logger.debug("Rewriting the whole document: %s", e)
+    # Merging modifies the pages, the reader may be shared
+    reader = PdfFileReader(BytesIO(data))
+    output = PdfFileWriter()
+    for page_index in range(reader.numPages):
+        page = reader.getPage(page_index)
+        for overlay in overlays.get(page_index + 1, []):
+            page.mergePage(overlay)
+        output.addPage(page)
+    stream = BytesIO()
+    output.write(stream)
+    return stream.getvalue()
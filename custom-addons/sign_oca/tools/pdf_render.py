@@ -0,0 +1,319 @@
+# Copyright 2023 Dixmit
+# License AGPL-3.0 or later (https://www.gnu.org/licenses/agpl).
+"""Overlay rendering for sign requests.
+
+Everything here works on plain item dicts and PDF boxes, without touching
+the ORM, so the same code can be used from the models and from any place
+where only bytes are available.
+"""
+
+import hashlib
+import logging
+import threading
+from base64 import b64decode
+from contextlib import contextmanager
+from io import BytesIO
+
+from PyPDF2 import PdfFileReader, PdfFileWriter
+from reportlab.graphics.shapes import Drawing, Line, Rect
+from reportlab.lib.colors import black, transparent
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+from reportlab.platypus import Paragraph
+
+from . import pdf_fonts, pdf_incremental
+
+_logger = logging.getLogger(__name__)
+
+IMAGE_CACHE_SIZE = 32
+
+_local = threading.local()
+
+
+def get_paragraph_style(font=None, size=None):
+    return pdf_fonts.get_paragraph_style(
+        font or pdf_fonts.DEFAULT_FONT, size or pdf_fonts.DEFAULT_FONT_SIZE
+    )
+
+
+class PageBox:
+    """Size of a page, usable where a PyPDF2 ``mediaBox`` is expected."""
+
+    __slots__ = ("width", "height", "rotation")
+
+    def __init__(self, width, height, rotation=0):
+        self.width = width
+        self.height = height
+        self.rotation = rotation
+
+    def getWidth(self):
+        return self.width
+
+    def getHeight(self):
+        return self.height
+
+
+def get_page_geometry(pdf_data):
+    """Return ``{page_number: {"width", "height", "rotation"}}`` of a document.
+
+    ``pdf_data`` are the bytes of the document or a ``PdfFileReader``.
+    """
+    reader = pdf_data
+    if not isinstance(reader, PdfFileReader):
+        reader = PdfFileReader(BytesIO(pdf_data))
+    geometry = {}
+    for page_index in range(reader.numPages):
+        page = reader.getPage(page_index)
+        box = page.mediaBox
+        geometry[page_index + 1] = {
+            "width": float(box.getWidth()),
+            "height": float(box.getHeight()),
+            "rotation": int(page.get("/Rotate") or 0) % 360,
+        }
+    return geometry
+
+
+def extract_page(pdf_data, page_number):
+    """Return page ``page_number`` of ``pdf_data`` as a standalone document."""
+    reader = PdfFileReader(BytesIO(pdf_data))
+    output = PdfFileWriter()
+    output.addPage(reader.getPage(page_number - 1))
+    stream = BytesIO()
+    output.write(stream)
+    return stream.getvalue()
+
+
+def get_page_boxes(geometry):
+    """Return ``{page_number: PageBox}`` from :func:`get_page_geometry`.
+
+    Page numbers may be strings, as they are once stored in JSON.
+    """
+    return {
+        int(page_number): PageBox(page["width"], page["height"], page["rotation"])
+        for page_number, page in geometry.items()
+    }
+
+
+def _get_box_size(box):
+    return float(box.getWidth()), float(box.getHeight())
+
+
+def draw_text(can, item, box, style):
+    if not item["value"]:
+        return False
+    box_width, box_height = _get_box_size(box)
+    par = Paragraph(item["value"], style=style)
+    par.wrap(
+        item["width"] / 100 * box_width,
+        item["height"] / 100 * box_height,
+    )
+    par.drawOn(
+        can,
+        item["position_x"] / 100 * box_width,
+        (100 - item["position_y"] - item["height"]) / 100 * box_height,
+    )
+    return True
+
+
+def draw_check(can, item, box, style):
+    box_width, box_height = _get_box_size(box)
+    width = item["width"] / 100 * box_width
+    height = item["height"] / 100 * box_height
+    drawing = Drawing(width=width, height=height)
+    drawing.add(
+        Rect(
+            0,
+            0,
+            width,
+            height,
+            strokeWidth=3,
+            strokeColor=black,
+            fillColor=transparent,
+        )
+    )
+    if item["value"]:
+        drawing.add(Line(0, 0, width, height, strokeColor=black, strokeWidth=3))
+        drawing.add(Line(0, height, width, 0, strokeColor=black, strokeWidth=3))
+    drawing.drawOn(
+        can,
+        item["position_x"] / 100 * box_width,
+        (100 - item["position_y"] - item["height"]) / 100 * box_height,
+    )
+    return True
+
+
+@contextmanager
+def image_cache():
+    """Decode each signature image once while the block runs.
+
+    Bulk signatures draw the same image on every document, the decoded
+    images are kept by content hash for the current thread.
+    """
+    previous = getattr(_local, "images", None)
+    _local.images = {} if previous is None else previous
+    try:
+        yield
+    finally:
+        _local.images = previous
+
+
+def enable_image_cache():
+    """Cache decoded images for the life of the current thread.
+
+    Meant as the initializer of the processes of a pool.
+    """
+    _local.images = {}
+
+
+def get_image_reader(value):
+    """Return an ``ImageReader`` of the base64 image ``value``."""
+    images = getattr(_local, "images", None)
+    key = None
+    if images is not None:
+        key = hashlib.sha1(value.encode()).hexdigest()
+        if key in images:
+            return images[key]
+    base64_str = value
+    if len(base64_str) % 4:
+        base64_str += "=" * (4 - len(base64_str) % 4)
+    if "," in base64_str:
+        base64_str = value.split(",")[1]
+    reader = ImageReader(BytesIO(b64decode(base64_str)))
+    if key is not None:
+        if len(images) >= IMAGE_CACHE_SIZE:
+            images.clear()
+        images[key] = reader
+    return reader
+
+
+def draw_signature(can, item, box, style):
+    if not item["value"]:
+        return False
+    box_width, box_height = _get_box_size(box)
+    try:
+        can.drawImage(
+            get_image_reader(item["value"]),
+            item["position_x"] / 100 * box_width,
+            (100 - item["position_y"] - item["height"]) / 100 * box_height,
+            item["width"] / 100 * box_width,
+            item["height"] / 100 * box_height,
+            mask="auto",
+        )
+    except Exception as e:
+        _logger.info("Error decoding Base64 string: %s", e)
+        return False
+    return True
+
+
+def draw_auto_fill(can, item, box, style):
+    display_value = item.get("value") or item.get("default_value") or ""
+    if not display_value:
+        return False
+    box_width, box_height = _get_box_size(box)
+    par = Paragraph(str(display_value), style=style)
+    width = item["width"] / 100 * box_width
+    height = item["height"] / 100 * box_height
+    par.wrap(width - 4, height - 4)
+    par.drawOn(
+        can,
+        item["position_x"] / 100 * box_width + 2,
+        (100 - item["position_y"] - item["height"]) / 100 * box_height + 2,
+    )
+    return True
+
+
+DRAWERS = {
+    "text": draw_text,
+    "check": draw_check,
+    "signature": draw_signature,
+    "auto_fill": draw_auto_fill,
+}
+
+
+def group_items_by_page(items):
+    """Return ``{page: [item, ...]}`` keeping the original item order.
+
+    The order inside a page is the drawing order, so later items stay on
+    top of earlier ones exactly as when every item had its own overlay.
+    """
+    pages = {}
+    for item in items:
+        pages.setdefault(item["page"], []).append(item)
+    return pages
+
+
+def render_overlay(items, box, style=None):
+    """Draw all ``items`` on a single canvas the size of ``box``.
+
+    Returns ``(page, drawn_items)`` where ``page`` is the overlay page ready
+    to be merged (or ``None`` when nothing was drawn) and ``drawn_items`` the
+    items that produced some output. Items whose type has no drawer are
+    ignored; callers handle them.
+    """
+    style = style or get_paragraph_style()
+    packet = BytesIO()
+    can = canvas.Canvas(packet, pagesize=(box.getWidth(), box.getHeight()))
+    drawn_items = []
+    for item in items:
+        drawer = DRAWERS.get(item.get("field_type"))
+        if drawer and drawer(can, item, box, style):
+            drawn_items.append(item)
+    if not drawn_items:
+        return None, drawn_items
+    can.save()
+    packet.seek(0)
+    return PdfFileReader(packet).getPage(0), drawn_items
+
+
+def can_render(items):
+    """Whether all ``items`` can be drawn without the models."""
+    return all(item.get("field_type") in DRAWERS for item in items)
+
+
+def render_pdf_data(pdf_data, items, style=None, boxes=None):
+    """Return ``(pdf_data, rendered_indexes)`` with ``items`` drawn.
+
+    Bytes only counterpart of ``sign.oca.request.signer._render_pdf_data``
+    for the item types of :data:`DRAWERS`. The indexes in ``items`` of the
+    items that produced some output are returned instead of the items, so
+    the result can cross process boundaries. ``boxes`` are the page sizes
+    (see :func:`get_page_boxes`), read from the document when not given.
+    """
+    style = style or get_paragraph_style()
+    reader = PdfFileReader(BytesIO(pdf_data))
+    if boxes is None:
+        boxes = get_page_boxes(get_page_geometry(reader))
+    indexes = {id(item): index for index, item in enumerate(items)}
+    overlays = {}
+    rendered = []
+    for page_number, page_items in group_items_by_page(items).items():
+        overlay, drawn_items = render_overlay(page_items, boxes[page_number], style)
+        if overlay:
+            overlays[page_number] = [overlay]
+        rendered += [indexes[id(item)] for item in drawn_items]
+    return (
+        pdf_incremental.write_overlays(pdf_data, reader, overlays),
+        sorted(rendered),
+    )
+
+
+def render_document(task):
+    """Process pool entry point.
+
+    ``task`` is ``(key, pdf_data, items, (font, size), geometry)``, the
+    geometry being the one of :func:`get_page_geometry` or ``None``. Returns
+    ``(key, pdf_data, rendered_indexes, error)``; exceptions are returned
+    as text so one broken document does not stop the others.
+    """
+    key, pdf_data, items, style_params, geometry = task
+    try:
+        data, rendered = render_pdf_data(
+            pdf_data,
+            items,
+            get_paragraph_style(*style_params),
+            boxes=get_page_boxes(geometry) if geometry else None,
+        )
+    except Exception as e:
+        _logger.debug("Rendering of %s failed", key, exc_info=True)
+        return key, None, [], str(e) or e.__class__.__name__
+    return key, data, rendered, None
@@ -1,7 +1,7 @@
 # Copyright 2024 ForgeFlow S.L. (http://www.forgeflow.com)
 # License LGPL-3.0 or later (https://www.gnu.org/licenses/lgpl.html).
 
-from odoo import fields, models
+from odoo import api, fields, models
 
 
 class ResConfigSettings(models.TransientModel):
@@ -10,3 +10,40 @@ class ResConfigSettings(models.TransientModel):
     sign_oca_send_sign_request_copy = fields.Boolean(
         related="company_id.sign_oca_send_sign_request_copy", readonly=False
     )
+    sign_oca_async_rendering = fields.Boolean(
+        related="company_id.sign_oca_async_rendering", readonly=False
+    )
+    sign_oca_async_hash_chain = fields.Boolean(
+        related="company_id.sign_oca_async_hash_chain", readonly=False
+    )
+    sign_oca_bulk_sign_workers = fields.Integer(
+        string="Bulk signing processes",
+        config_parameter="sign_oca.bulk_sign_workers",
+        help="Number of processes rendering the documents of a bulk signature. "
+        "1 or empty renders them in the server process; set a higher value to "
+        "use a pool of that many processes, up to the number of CPUs.",
+    )
+    sign_oca_bulk_sign_chunk_size = fields.Integer(
+        string="Bulk signing chunk size",
+        config_parameter="sign_oca.bulk_sign_chunk_size",
+        help="Number of documents saved in each transaction of a bulk signature.",
+    )
+    sign_oca_collect_metrics = fields.Boolean(
+        string="Record signing metrics",
+        help="Record the duration of every signature. Metrics older than 90 "
+        "days are removed automatically.",
+    )
+
+    @api.model
+    def get_values(self):
+        res = super().get_values()
+        res["sign_oca_collect_metrics"] = self.env["sign.oca.metric"]._is_enabled()
+        return res
+
+    def set_values(self):
+        res = super().set_values()
+        # Stored as 0 when disabled, as metrics are recorded when it is unset
+        self.env["ir.config_parameter"].sudo().set_param(
+            "sign_oca.collect_metrics", "1" if self.sign_oca_collect_metrics else "0"
+        )
+        return res
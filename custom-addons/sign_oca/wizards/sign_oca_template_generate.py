@@ -30,7 +30,6 @@ class SignOcaTemplateGenerate(models.TransientModel):
             "name": self.template_id.name,
             "template_id": self.template_id.id,
             "signatory_data": self.template_id._get_signatory_data(),
-            "data": self.template_id.data,
             "ask_location": self.template_id.ask_location,
             "signer_ids": [
                 (
@@ -19,12 +19,8 @@ class SignOcaTemplateGenerateMulti(models.TransientModel):
     message = fields.Html()
 
     def _prepare_sign_oca_request_vals(self):
-        vals = []
-        for item in self.env[self.model].browse(self.env.context.get("active_ids")):
-            vals.append(
-                self.template_id._prepare_sign_oca_request_vals_from_record(item)
-            )
-        return vals
+        records = self.env[self.model].browse(self.env.context.get("active_ids"))
+        return self.template_id._prepare_sign_oca_request_vals_from_records(records)
 
     def _generate(self):
         return self.env["sign.oca.request"].create(
@@ -33,8 +29,7 @@ class SignOcaTemplateGenerateMulti(models.TransientModel):
 
     def generate(self):
         requests = self._generate()
-        for request in requests:
-            request.action_send(message=self.message)
+        requests.action_send_multi(message=self.message)
         action = self.env["ir.actions.act_window"]._for_xml_id(
             "sign_oca.sign_oca_request_act_window"
         )